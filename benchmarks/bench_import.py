@@ -0,0 +1,82 @@
+"""Время импорта homework.py и его побочные эффекты.
+
+Импорт выполняется в отдельном процессе во временном каталоге; после
+него проверяется, какие тяжёлые модули загружены, какие файлы созданы
+и какие потоки запущены. С --rev то же самое замеряется для другой
+ревизии репозитория, например до оптимизации:
+
+    python benchmarks/bench_import.py --rev HEAD~1
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 15
+HEAVY_MODULES = ('requests', 'telegram', 'dotenv', 'http.server')
+
+PROBE = '''
+import json, os, sys, threading, time
+started = time.perf_counter()
+import homework
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "heavy": [name for name in %r if name in sys.modules],
+    "files": sorted(os.listdir(".")),
+    "threads": threading.active_count(),
+}))
+''' % (HEAVY_MODULES,)
+
+
+def measure(source_dir, runs):
+    """Медиана времени импорта и побочные эффекты последнего запуска."""
+    timings = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            output = subprocess.run(
+                [sys.executable, '-c', PROBE], cwd=workdir, check=True,
+                capture_output=True, text=True,
+                env={**os.environ, 'PYTHONPATH': source_dir}
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+    result['seconds'] = statistics.median(timings)
+    return result
+
+
+def export_revision(revision, target):
+    """Выгрузка дерева ревизии во временный каталог."""
+    archive = subprocess.run(
+        ['git', 'archive', revision], cwd=ROOT_DIR, check=True,
+        capture_output=True
+    ).stdout
+    subprocess.run(['tar', '-x', '-C', target], input=archive, check=True)
+
+
+def show(name, result):
+    print(f'{name}: {result["seconds"] * 1e3:.1f} мс, '
+          f'тяжёлые модули: {", ".join(result["heavy"]) or "нет"}, '
+          f'созданы файлы: {", ".join(result["files"]) or "нет"}, '
+          f'потоков: {result["threads"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rev', help='ревизия git для сравнения')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    args = parser.parse_args()
+
+    if args.rev:
+        with tempfile.TemporaryDirectory() as source_dir:
+            export_revision(args.rev, source_dir)
+            show(args.rev, measure(source_dir, args.runs))
+    show('рабочее дерево', measure(ROOT_DIR, args.runs))
+
+
+if __name__ == '__main__':
+    main()
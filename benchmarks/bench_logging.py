@@ -0,0 +1,135 @@
+"""Объём лога на один цикл опроса: прежний формат против JSON с прореживанием.
+
+Движок опрашивает подписки через заглушку API, записи пишутся в файл
+так же, как в работе. Прежний вариант — строка «время [уровень] текст»
+на каждую запись, новый — JSON-строки с полями подписки и цикла
+и SamplingFilter, как в setup_logging:
+
+    python benchmarks/bench_logging.py --tenants 100 --cycles 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+from stubs import CURRENT_DATE, MockResponseGET, quiet_logging
+
+import homework
+from engine import PollingEngine
+from log_config import (JsonFormatter, LogPipeline, SamplingFilter,
+                        formatter)
+from tenants import Tenant
+
+
+class ChangingSession:
+    """API, у которого каждый цикл меняется current_date.
+
+    Раз в change_every циклов у домашки меняется статус, остальные
+    циклы проходят по обычному пути «нового сообщения нет».
+    """
+
+    def __init__(self, change_every=10):
+        self.change_every = change_every
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        self.calls += 1
+        cycle = params['from_date'] - CURRENT_DATE
+        status = ('reviewing', 'approved')[
+            cycle // self.change_every % 2
+        ]
+        return MockResponseGET(json.dumps({
+            'homeworks': [{'id': 1, 'homework_name': 'hw.zip',
+                           'status': status}],
+            'current_date': params['from_date'] + 1,
+        }).encode())
+
+    def head(self, url, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+class StubBot:
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        pass
+
+
+def measure(structured, sampling, tenants, cycles):
+    """Байт лога на цикл опроса одной подписки."""
+    path = os.path.join(tempfile.mkdtemp(), 'bench.log')
+    pipeline = LogPipeline(homework.logger)
+    handler = logging.FileHandler(path, encoding='utf-8')
+    if sampling:
+        pipeline.handler.addFilter(SamplingFilter())
+    pipeline.add_handler(
+        handler,
+        handler_formatter=JsonFormatter() if structured else formatter
+    )
+    pipeline.start()
+
+    engine = PollingEngine(
+        [Tenant(f'token{number}', number, CURRENT_DATE)
+         for number in range(tenants)],
+        StubBot(), session=ChangingSession()
+    )
+    engine.outbox.spill_path = os.path.join(
+        os.path.dirname(path), 'outbox.spill'
+    )
+
+    async def poll():
+        for _ in range(cycles):
+            await engine.poll_all()
+            await engine.outbox.flush()
+
+    started = time.perf_counter()
+    asyncio.run(poll())
+    elapsed = time.perf_counter() - started
+    pipeline.stop()
+    homework.logger.removeHandler(pipeline.handler)
+    handler.close()
+    engine.executor.shutdown()
+    size = os.path.getsize(path)
+    with open(path, encoding='utf-8') as file:
+        lines = sum(1 for _ in file)
+    return size / (tenants * cycles), lines, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--cycles', type=int, default=20)
+    args = parser.parse_args()
+
+    quiet_logging(homework)
+    homework.logger.handlers = []
+    cases = (
+        ('прежний формат', False, False),
+        ('JSON', True, False),
+        ('JSON + прореживание', True, True),
+    )
+    baseline = None
+    for name, structured, sampling in cases:
+        per_cycle, lines, elapsed = measure(
+            structured, sampling, args.tenants, args.cycles
+        )
+        baseline = baseline or per_cycle
+        print(
+            f'{name:>20}: {per_cycle:8.1f} байт на цикл '
+            f'(в {baseline / per_cycle:.1f} раза меньше), '
+            f'строк: {lines}, время: {elapsed:.2f} с'
+        )
+    print(
+        'Прореживание пропускает одну запись каждого вида в минуту: '
+        'замер укладывается в одно окно, в работе объём лога в минуту '
+        'не растёт с числом подписок и циклов.'
+    )
+
+
+if __name__ == '__main__':
+    main()
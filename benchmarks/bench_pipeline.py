@@ -0,0 +1,161 @@
+"""Микробенчмарки этапов опроса: get_api_answer, check_response,
+parse_status и send_message.
+
+Для каждого этапа и размера ответа считаются операции в секунду,
+перцентили времени одного вызова и выделения памяти за вызов.
+Результаты сохраняются в JSON, два таких файла можно сравнить:
+
+    python benchmarks/bench_pipeline.py --output before.json
+    python benchmarks/bench_pipeline.py --output after.json
+    python benchmarks/bench_pipeline.py --compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from stubs import (ROOT_DIR, MockSession, MockTelegramBot, make_body,
+                   make_homework, quiet_logging)
+
+import homework
+
+SIZES = (0, 10, 1_000, 10_000, 100_000)
+# Время на один замер и пределы числа вызовов в нём.
+CASE_SECONDS = 0.5
+MIN_CALLS = 5
+MAX_CALLS = 100_000
+# Замедление, начиная с которого --compare считает замер регрессией.
+THRESHOLD = 0.10
+
+
+def stage_cases(sizes):
+    """Пары (этап, размер, вызов без аргументов)."""
+    headers = {'Authorization': 'OAuth token'}
+    for size in sizes:
+        session = MockSession(make_body(size))
+        yield ('get_api_answer', size, lambda session=session:
+               homework.request_api_answer(headers, 1, session))
+        response = json.loads(session.response.content)
+        yield ('check_response', size, lambda response=response:
+               homework.check_response(response))
+
+    record = make_homework(1)
+    yield 'parse_status', 1, lambda: homework.parse_status(record)
+    bot = MockTelegramBot('token')
+    yield 'send_message', 1, lambda: homework.send_message(bot, 'Текст')
+
+
+def percentile(values, share):
+    """Перцентиль по отсортированному списку."""
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def measure(call):
+    """Замер одного этапа: скорость, перцентили и память."""
+    timings = []
+    deadline = time.perf_counter() + CASE_SECONDS
+    while len(timings) < MIN_CALLS or (
+            len(timings) < MAX_CALLS and time.perf_counter() < deadline):
+        started = time.perf_counter_ns()
+        call()
+        timings.append(time.perf_counter_ns() - started)
+    timings.sort()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    call()
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+
+    total = sum(timings)
+    return {
+        'calls': len(timings),
+        'ops_per_sec': round(len(timings) / total * 1e9, 2),
+        'p50_us': percentile(timings, 0.50) / 1e3,
+        'p95_us': percentile(timings, 0.95) / 1e3,
+        'p99_us': percentile(timings, 0.99) / 1e3,
+        'max_us': timings[-1] / 1e3,
+        'alloc_peak_bytes': peak,
+        'alloc_blocks': blocks,
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+            check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, output):
+    quiet_logging(homework)
+    results = []
+    print(f'{"stage":<16} {"size":>7} {"ops/s":>12} {"p50, µs":>10} '
+          f'{"p95, µs":>10} {"p99, µs":>10} {"peak, KiB":>10}')
+    for stage, size, call in stage_cases(sizes):
+        result = {'stage': stage, 'size': size, **measure(call)}
+        results.append(result)
+        print(f'{stage:<16} {size:>7} {result["ops_per_sec"]:>12.1f} '
+              f'{result["p50_us"]:>10.1f} {result["p95_us"]:>10.1f} '
+              f'{result["p99_us"]:>10.1f} '
+              f'{result["alloc_peak_bytes"] / 1024:>10.1f}')
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump({
+                'commit': current_commit(),
+                'python': platform.python_version(),
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results,
+            }, file, ensure_ascii=False, indent=2)
+        print(f'Результаты сохранены в {output}')
+
+
+def compare(old_path, new_path, threshold=THRESHOLD):
+    """Сравнение p50 двух прогонов; код возврата 1 при регрессии."""
+    with open(old_path, encoding='utf-8') as file:
+        old = json.load(file)
+    with open(new_path, encoding='utf-8') as file:
+        new = json.load(file)
+    baseline = {(r['stage'], r['size']): r for r in old['results']}
+
+    regressions = 0
+    print(f'{old.get("commit")} -> {new.get("commit")}')
+    for result in new['results']:
+        previous = baseline.get((result['stage'], result['size']))
+        if previous is None:
+            continue
+        change = result['p50_us'] / previous['p50_us'] - 1
+        mark = ''
+        if change > threshold:
+            mark = '  РЕГРЕССИЯ'
+            regressions += 1
+        print(f'{result["stage"]:<16} {result["size"]:>7} '
+              f'{previous["p50_us"]:>10.1f} -> {result["p50_us"]:>10.1f} µs '
+              f'({change:+.1%}){mark}')
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--output', help='файл для сохранения результатов')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args()
+    if args.compare:
+        sys.exit(compare(*args.compare, threshold=args.threshold))
+    run(args.sizes, args.output)
+
+
+if __name__ == '__main__':
+    main()
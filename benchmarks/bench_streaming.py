@@ -0,0 +1,84 @@
+"""Пиковая память при разборе ответа API целиком и потоком.
+
+Каждый замер выполняется в отдельном процессе, чтобы пиковый RSS
+(ru_maxrss) не накапливался между замерами:
+
+    python benchmarks/bench_streaming.py [размер ...]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+SIZES = (0, 1_000, 10_000, 100_000)
+CHUNK_SIZE = 64 * 1024
+
+
+def payload_chunks(size):
+    """Тело ответа API с size домашками блоками по CHUNK_SIZE байт."""
+    buffer = '{"homeworks": ['
+    for number in range(size):
+        if number:
+            buffer += ', '
+        buffer += json.dumps({
+            'id': number,
+            'status': 'approved',
+            'homework_name': f'student__hw{number}.zip',
+            'reviewer_comment': 'Всё нравится, работа принята.',
+            'date_updated': '2020-02-13T14:40:57Z',
+            'lesson_name': 'Итоговый проект',
+        }, ensure_ascii=False)
+        if len(buffer) >= CHUNK_SIZE:
+            yield buffer.encode()
+            buffer = ''
+    yield (buffer + '], "current_date": 1581604970}').encode()
+
+
+def run_case(mode, size):
+    """Разбор ответа в текущем процессе; печать JSON с результатом."""
+    from json_stream import HomeworkStream
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if mode == 'json':
+        # Как response.json(): всё тело и весь документ в памяти.
+        body = b''.join(payload_chunks(size))
+        count = len(json.loads(body)['homeworks'])
+    else:
+        count = sum(1 for _ in HomeworkStream(payload_chunks(size)))
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'mode': mode,
+        'size': size,
+        'count': count,
+        'seconds': round(elapsed, 4),
+        'peak_rss_kb': peak,
+        'growth_kb': peak - baseline,
+    }))
+
+
+def main(sizes):
+    print(f'{"homeworks":>10} {"mode":>7} {"peak RSS, KiB":>14} '
+          f'{"growth, KiB":>12} {"time, s":>8}')
+    for size in sizes:
+        for mode in ('json', 'stream'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--case', mode, str(size)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output)
+            print(f'{size:>10} {mode:>7} {result["peak_rss_kb"]:>14} '
+                  f'{result["growth_kb"]:>12} {result["seconds"]:>8}')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--case']:
+        run_case(sys.argv[2], int(sys.argv[3]))
+    else:
+        main([int(size) for size in sys.argv[1:]] or SIZES)
@@ -0,0 +1,76 @@
+"""Стоимость проверки ответа API на 10 тысяч домашек.
+
+Сравнивается прежний способ — check_response смотрел только на первую
+запись, остальные проверялись в parse_status при разборе, — с новой
+проверкой всех записей за один проход:
+
+    python benchmarks/bench_validation.py [количество домашек]
+"""
+import sys
+import timeit
+
+from stubs import quiet_logging
+
+import homework
+from exceptions import JSONContentError, ParsingError
+
+RECORDS = 10_000
+
+
+def legacy_check_response(response):
+    """check_response до перехода на схему (для сравнения)."""
+    logger = homework.logger
+    if not isinstance(response['homeworks'], list):
+        logger.error('В ответе от API нет списка домашек.')
+        raise JSONContentError('В ответе от API нет списка домашек.')
+
+    try:
+        homeworks = response['homeworks']
+    except TypeError:
+        raise JSONContentError('Не удалось получить домашки из ответа от API.')
+    else:
+        logger.info('Список домашек в ответе от API получен.')
+
+    if homeworks and not isinstance(homeworks[0], dict):
+        raise JSONContentError('Содержимое списка домашек некорректно.')
+
+    return homeworks
+
+
+def legacy_validate_all(response):
+    """Прежний путь к проверке каждой записи: через parse_status."""
+    for record in legacy_check_response(response):
+        try:
+            homework.parse_status(record)
+        except (ParsingError, KeyError):
+            pass
+
+
+def main(records):
+    quiet_logging(homework)
+
+    response = {
+        'homeworks': [
+            {'id': number, 'homework_name': f'hw{number}.zip',
+             'status': 'approved', 'lesson_name': 'Итоговый проект'}
+            for number in range(records)
+        ],
+        'current_date': 1581604970,
+    }
+    cases = (
+        ('legacy check_response (только 1-я запись)',
+         lambda: legacy_check_response(response)),
+        ('legacy check_response + parse_status на всех',
+         lambda: legacy_validate_all(response)),
+        ('check_response со схемой (все записи)',
+         lambda: homework.check_response(response)),
+    )
+    print(f'Домашек в ответе: {records}')
+    for name, case in cases:
+        number, _ = timeit.Timer(case).autorange()
+        best = min(timeit.repeat(case, number=number, repeat=5)) / number
+        print(f'{name:<48} {best * 1e3:10.3f} мс')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS)
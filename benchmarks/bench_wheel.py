@@ -0,0 +1,103 @@
+"""Колесо таймеров на 100 тысяч заданий опроса.
+
+Сравнивается с кучей heapq (так устроены таймеры asyncio: sleep на
+подписку — это запись в куче цикла событий): время добавления, отмены
+и срабатывания заданий. Отдельно показано, как распределяются опросы
+по секундам: с постоянным сдвигом по токену (phase) и после волны,
+когда все подписки опрошены одновременно, с разбросом интервала
+по токену (spread) и без него:
+
+    python benchmarks/bench_wheel.py [количество заданий]
+"""
+import heapq
+import random
+import sys
+import time
+from collections import Counter
+
+from stubs import ROOT_DIR  # noqa: F401 — путь к модулям бота
+
+from scheduler import phase, spread
+from timing_wheel import TimingWheel
+
+JOBS = 100_000
+INTERVAL = 600
+CANCEL_SHARE = 0.1
+CYCLES = 10
+
+
+def bench_wheel(deadlines, cancelled):
+    wheel = TimingWheel(tick=1.0)
+    started = time.perf_counter()
+    timers = [wheel.schedule(when, number)
+              for number, when in enumerate(deadlines)]
+    inserted = time.perf_counter()
+    for number in cancelled:
+        wheel.cancel(timers[number])
+    cancelled_at = time.perf_counter()
+    expired = 0
+    for now in range(1, INTERVAL + 2):
+        expired += len(wheel.advance(now))
+    finished = time.perf_counter()
+    return (inserted - started, cancelled_at - inserted,
+            finished - cancelled_at, expired)
+
+
+def bench_heap(deadlines, cancelled):
+    heap = []
+    started = time.perf_counter()
+    entries = []
+    for number, when in enumerate(deadlines):
+        entry = [when, number, False]
+        heapq.heappush(heap, entry)
+        entries.append(entry)
+    inserted = time.perf_counter()
+    # Как в asyncio: отмена только помечает запись, удаляется она
+    # при извлечении из кучи.
+    for number in cancelled:
+        entries[number][2] = True
+    cancelled_at = time.perf_counter()
+    expired = 0
+    for now in range(1, INTERVAL + 2):
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if not entry[2]:
+                expired += 1
+    finished = time.perf_counter()
+    return (inserted - started, cancelled_at - inserted,
+            finished - cancelled_at, expired)
+
+
+def peak_per_second(moments):
+    """Наибольшее число опросов за одну секунду."""
+    return max(Counter(int(moment) for moment in moments).values())
+
+
+def main(jobs):
+    tokens = [f'token{number}' for number in range(jobs)]
+    deadlines = [INTERVAL * phase(token) for token in tokens]
+    cancelled = random.Random(1).sample(range(jobs),
+                                        int(jobs * CANCEL_SHARE))
+
+    print(f'Заданий: {jobs}, отменено: {len(cancelled)}')
+    print(f'{"":>14} {"добавление":>12} {"отмена":>10} '
+          f'{"срабатывание":>13}  мкс на задание')
+    for name, bench in (('колесо', bench_wheel), ('heapq', bench_heap)):
+        insert, cancel, expire, expired = bench(deadlines, cancelled)
+        print(f'{name:>14} {insert / jobs * 1e6:12.3f} '
+              f'{cancel / len(cancelled) * 1e6:10.3f} '
+              f'{expire / expired * 1e6:13.3f}')
+
+    print()
+    print(f'Опросов в секунду при интервале {INTERVAL} с: в среднем '
+          f'{jobs / INTERVAL:.0f}')
+    print(f'  сдвиг по токену, пик: {peak_per_second(deadlines)}')
+    for name, factor in (('без разброса', lambda token: 1),
+                         ('с разбросом', spread)):
+        moments = [CYCLES * INTERVAL * factor(token) for token in tokens]
+        print(f'  волна через {CYCLES} циклов {name}, пик: '
+              f'{peak_per_second(moments)}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else JOBS)
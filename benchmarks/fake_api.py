@@ -0,0 +1,186 @@
+"""Локальная замена API Практикума для нагрузочных прогонов.
+
+Сервер отдаёт домашки в формате homework_statuses: по токену
+из Authorization, с фильтром from_date и current_date по модельному
+времени. Статусы меняются по заранее построенному расписанию, которое
+служит эталоном для поиска пропущенных и повторных уведомлений.
+"""
+import json
+import multiprocessing
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HOUR = 60 * 60
+VERDICTS = ('approved', 'rejected')
+
+
+class SimulatedClock:
+    """Модельное время, идущее в factor раз быстрее реального."""
+
+    def __init__(self, factor, start=None, started=None):
+        self.factor = factor
+        self.start = int(time.time()) if start is None else start
+        # time.monotonic() общее для процессов одной машины, поэтому часы
+        # можно воспроизвести в процессе сервера.
+        self.started = time.monotonic() if started is None else started
+
+    def state(self):
+        return self.factor, self.start, self.started
+
+    def __call__(self):
+        return self.start + (time.monotonic() - self.started) * self.factor
+
+
+class FakePracticum:
+    """Данные и поведение поддельного API.
+
+    Для каждого токена создаётся homeworks домашек: каждая уходит на
+    проверку в случайный момент первой половины прогона и получает
+    вердикт через 1–6 модельных часов.
+    """
+
+    def __init__(self, clock, tokens, duration, homeworks=3, latency=0.0,
+                 error_rate=0.0, throttle_rate=0.0, padding=0, seed=0):
+        self.clock = clock
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.padding = padding
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.schedule = {}
+        self.events = []
+        for token in tokens:
+            self.schedule[token] = [
+                self.make_homework(token, number, duration)
+                for number in range(homeworks)
+            ]
+
+    def make_homework(self, token, number, duration):
+        name = f'{token}__hw{number}.zip'
+        submitted = self.clock.start + self.random.uniform(0, duration / 2)
+        checked = submitted + self.random.uniform(HOUR, 6 * HOUR)
+        transitions = [
+            (submitted, 'reviewing'),
+            (checked, self.random.choice(VERDICTS)),
+        ]
+        for moment, status in transitions:
+            self.events.append((token, name, status, moment))
+        return number, name, transitions
+
+    def answer(self, token, from_date):
+        """Тело ответа: домашки, изменившиеся начиная с from_date."""
+        now = self.clock()
+        homeworks = []
+        for number, name, transitions in self.schedule.get(token, ()):
+            current = None
+            for moment, status in transitions:
+                if moment <= now:
+                    current = moment, status
+            if current is None or current[0] < from_date:
+                continue
+            homeworks.append({
+                'id': number,
+                'homework_name': name,
+                'status': current[1],
+                'reviewer_comment': '',
+                'date_updated': datetime.fromtimestamp(
+                    current[0], timezone.utc
+                ).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'lesson_name': 'Нагрузочный прогон',
+            })
+        # Неизменные старые записи: так выглядит ответ при from_date=0.
+        homeworks.extend(
+            {'id': -number, 'homework_name': f'old{number}.zip',
+             'status': 'approved'}
+            for number in range(1, self.padding + 1)
+        )
+        return {'homeworks': homeworks, 'current_date': int(now)}
+
+    def outcome(self):
+        """HTTP-статус следующего ответа с учётом внедрённых сбоев."""
+        roll = self.random.random()
+        if roll < self.error_rate:
+            return 500
+        if roll < self.error_rate + self.throttle_rate:
+            return 429
+        return 200
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело пишутся отдельно: без этого Nagle и отложенный
+    # ACK добавляют к каждому ответу десятки миллисекунд.
+    disable_nagle_algorithm = True
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        api = self.server.api
+        if self.path == '/stats':
+            body = json.dumps(
+                {'requests': api.requests, 'errors': api.errors}
+            ).encode()
+            return self.reply(200, body)
+        if api.latency:
+            time.sleep(api.latency)
+        with api.lock:
+            api.requests += 1
+            status = api.outcome()
+        if status != 200:
+            with api.lock:
+                api.errors += 1
+            return self.reply(status, b'{}')
+
+        token = self.headers.get('Authorization', '').split(' ', 1)[-1]
+        query = parse_qs(urlparse(self.path).query)
+        from_date = int(float(query.get('from_date', ['0'])[0]))
+        body = json.dumps(api.answer(token, from_date)).encode()
+        self.reply(200, body)
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(connection, clock_state, tokens, duration, options):
+    """Точка входа процесса сервера: порт отправляется в connection."""
+    api = FakePracticum(
+        SimulatedClock(*clock_state), tokens, duration, **options
+    )
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.api = api
+    connection.send(server.server_address[1])
+    server.serve_forever()
+
+
+def start_server(clock, tokens, duration, **options):
+    """Запуск сервера в отдельном процессе, чтобы он не делил GIL с ботом.
+
+    Возвращает процесс, URL эндпоинта и URL статистики запросов.
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=serve, daemon=True,
+        args=(child, clock.state(), tokens, duration, options)
+    )
+    process.start()
+    root = f'http://127.0.0.1:{parent.recv()}'
+    return process, f'{root}/api/user_api/homework_statuses/', root + '/stats'
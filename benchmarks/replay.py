@@ -0,0 +1,112 @@
+"""Воспроизведение журнала RECORD_FILE без сети.
+
+Записанные ответы API проходят тот же путь, что и в работе:
+request_api_answer (основа get_api_answer) → check_response →
+parse_status (через diff_homeworks, с отдельным состоянием на каждый
+токен) → send_chat_message, — так быстро, как позволяет процессор. В конце
+выводятся пропускная способность, ошибки по классам и сверка
+сформированных сообщений с записанными отправками:
+
+    python benchmarks/replay.py homework_bot.journal.gz
+"""
+import argparse
+import json
+import time
+from collections import Counter
+
+from stubs import MockResponseGET, MockTelegramBot, quiet_logging
+
+import homework
+from journal import read_journal
+
+
+class ReplaySession:
+    """Сессия, которая отдаёт заранее подставленный ответ."""
+
+    def __init__(self):
+        self.response = None
+
+    def get(self, url, **kwargs):
+        return self.response
+
+
+def replay(records):
+    """Прогон записей журнала; статистика воспроизведения."""
+    session = ReplaySession()
+    bot = MockTelegramBot()
+    indexes = {}
+    errors = Counter()
+    produced = Counter()
+    recorded = Counter()
+    responses = 0
+
+    started = time.perf_counter()
+    for record in records:
+        if record['kind'] == 'send':
+            if 'error' not in record:
+                recorded[record['text']] += 1
+            continue
+        if record['status'] == 304:
+            continue
+        responses += 1
+        session.response = MockResponseGET(
+            record['body'].encode(), record['status']
+        )
+        index = indexes.setdefault(record['tenant'], {})
+        try:
+            answer = homework.request_api_answer(
+                {}, record['params'].get('from_date'), session
+            )
+            homeworks = homework.check_response(answer)
+        except Exception as error:
+            errors[type(error).__name__] += 1
+            continue
+        for message in homework.diff_homeworks(index, homeworks):
+            homework.send_chat_message(bot, record['tenant'], message)
+            produced[message] += 1
+    elapsed = time.perf_counter() - started
+    return {
+        'responses': responses,
+        'tenants': len(indexes),
+        'messages': bot.sent,
+        'elapsed': elapsed,
+        'errors': dict(errors),
+        'missing': sorted(set(recorded) - set(produced)),
+        'unexpected': sorted(set(produced) - set(recorded)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('journal', help='файл журнала (RECORD_FILE)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='сколько раз прогнать журнал для замера')
+    parser.add_argument('--json', action='store_true',
+                        help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    quiet_logging(homework)
+    records = list(read_journal(args.journal))
+    results = [replay(records) for _ in range(args.repeat)]
+    result = results[-1]
+    result['elapsed'] = min(run['elapsed'] for run in results)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    rate = result['responses'] / result['elapsed'] if result['elapsed'] else 0
+    print(f'Ответов API: {result["responses"]}, токенов: {result["tenants"]}')
+    print(f'Сообщений: {result["messages"]}')
+    print(f'Время: {result["elapsed"]:.3f} с, {rate:,.0f} ответов/с')
+    for name, count in sorted(result['errors'].items()):
+        print(f'Ошибка {name}: {count}')
+    for title, key in (('Записаны, но не сформированы', 'missing'),
+                       ('Сформированы, но не записаны', 'unexpected')):
+        if result[key]:
+            print(f'{title}: {len(result[key])}')
+            for text in result[key][:10]:
+                print(f'  {text}')
+
+
+if __name__ == '__main__':
+    main()
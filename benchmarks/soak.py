@@ -0,0 +1,209 @@
+"""Нагрузочный прогон настоящего цикла опроса против поддельного API.
+
+PollingEngine опрашивает локальный сервер fake_api со всеми
+подписками, время сжато в --factor раз. В конце выводятся пропускная
+способность, задержка уведомлений в модельном времени, рост памяти,
+пропущенные и повторные уведомления:
+
+    python benchmarks/soak.py --tenants 500 --hours 24 --factor 3600
+"""
+import argparse
+import asyncio
+import os
+import re
+import resource
+import tempfile
+import time
+from collections import Counter
+
+import requests
+
+from fake_api import HOUR, FakePracticum, SimulatedClock, start_server
+from stubs import quiet_logging
+
+import engine
+import homework
+from outbox import CHAT_RATE, GLOBAL_RATE, TokenBucket
+from scheduler import AdaptivePolicy
+from tenants import Tenant
+
+MESSAGE = re.compile(r'Изменился статус проверки работы "(.+)"\. (.+)')
+STATUSES = {verdict: status
+            for status, verdict in homework.HOMEWORK_STATUSES.items()}
+SAMPLE_INTERVAL = 1
+
+
+class ScaledPolicy:
+    """Политика опроса с интервалами, сжатыми в factor раз."""
+
+    def __init__(self, policy, factor):
+        self.policy = policy
+        self.factor = factor
+
+    def next_interval(self, tenant, error=None):
+        return self.policy.next_interval(tenant, error) / self.factor
+
+
+class StubBot:
+    """Заглушка Telegram: запоминает уведомления и модельное время."""
+
+    def __init__(self, clock, latency=0.0):
+        self.clock = clock
+        self.latency = latency
+        self.received = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        self.received.append((chat_id, text, self.clock()))
+
+
+def rss_kib():
+    """Текущий RSS процесса, а без /proc — пиковый."""
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def sample_memory(clock, samples):
+    while True:
+        samples.append((clock(), rss_kib()))
+        await asyncio.sleep(SAMPLE_INTERVAL)
+
+
+async def soak(args):
+    clock = SimulatedClock(args.factor)
+    duration = args.hours * HOUR
+    tokens = [f'token{number}' for number in range(args.tenants)]
+    options = dict(
+        homeworks=args.homeworks, latency=args.latency,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        padding=args.padding
+    )
+    # Такое же расписание, как в процессе сервера: оно служит эталоном.
+    api = FakePracticum(clock, tokens, duration, **options)
+    server, url, stats_url = start_server(clock, tokens, duration, **options)
+    homework.ENDPOINT = engine.ENDPOINT = url
+
+    bot = StubBot(clock, args.telegram_latency)
+    tenants = [
+        Tenant(token, number, clock.start)
+        for number, token in enumerate(tokens)
+    ]
+    polling = engine.PollingEngine(
+        tenants, bot,
+        retry_time=homework.RETRY_TIME / args.factor,
+        policy=ScaledPolicy(AdaptivePolicy(), args.factor),
+        max_workers=args.workers
+    )
+    polling.outbox.bucket = TokenBucket(GLOBAL_RATE * args.factor,
+                                        GLOBAL_RATE * args.factor)
+    polling.outbox.chat_rate = CHAT_RATE * args.factor
+    polling.breaker.reset_timeout /= args.factor
+    polling.breaker.policy.delay /= args.factor
+    polling.outbox.spill_path = os.path.join(
+        tempfile.mkdtemp(), 'outbox.spill'
+    )
+
+    samples = []
+    sampler = asyncio.ensure_future(sample_memory(clock, samples))
+    started = time.monotonic()
+    asyncio.get_running_loop().call_later(
+        duration / args.factor, polling.stop
+    )
+    await polling.serve()
+    elapsed = time.monotonic() - started
+    sampler.cancel()
+    stats = requests.get(stats_url).json()
+    server.terminate()
+    return stats, api, bot, clock, samples, elapsed
+
+
+def report(args, stats, api, bot, clock, samples, elapsed):
+    # Последние события бот мог ещё не успеть увидеть: не ждём
+    # уведомлений о них дольше самого длинного интервала опроса.
+    grace = AdaptivePolicy().idle + AdaptivePolicy().backoff_max
+    deadline = clock() - grace
+    expected = {
+        (int(token[len('token'):]), name, status): moment
+        for token, name, status, moment in api.events
+        if moment <= deadline
+    }
+
+    received = Counter()
+    latencies = []
+    for chat_id, text, moment in bot.received:
+        match = MESSAGE.match(text)
+        if match is None:
+            continue
+        key = chat_id, match.group(1), STATUSES.get(match.group(2))
+        received[key] += 1
+        if key in expected and received[key] == 1:
+            latencies.append(moment - expected[key])
+
+    missed = [key for key in expected if key not in received]
+    duplicates = sum(count - 1 for count in received.values() if count > 1)
+    latencies.sort()
+
+    def quantile(share):
+        if not latencies:
+            return float('nan')
+        return latencies[min(len(latencies) - 1, int(len(latencies) * share))]
+
+    growth = samples[-1][1] - samples[0][1] if samples else 0
+    print(f'Подписок: {args.tenants}, модельных часов: {args.hours}, '
+          f'реальное время: {elapsed:.1f} с (x{args.factor})')
+    print(f'Запросов к API: {stats["requests"]} '
+          f'({stats["requests"] / elapsed:.1f}/с), '
+          f'из них сбоев: {stats["errors"]}')
+    # Частота, с которой подписки опрашивались бы с интервалом по
+    # умолчанию; если процесс до неё не дотягивает, результаты отражают
+    # его предел, а не поведение при реальной нагрузке.
+    demand = args.tenants * args.factor / homework.RETRY_TIME
+    if stats['requests'] / elapsed < 0.9 * demand:
+        print(f'Процесс не успевает: нужно около {demand:.0f} запросов/с, '
+              f'уменьшите --factor или --tenants.')
+    print(f'Уведомлений: {len(bot.received)} '
+          f'({len(bot.received) / elapsed:.1f}/с)')
+    print(f'Ожидалось уведомлений: {len(expected)}, пропущено: '
+          f'{len(missed)}, повторов: {duplicates}')
+    print(f'Задержка уведомления, модельные минуты: '
+          f'p50 {quantile(0.5) / 60:.1f}, p95 {quantile(0.95) / 60:.1f}, '
+          f'max {quantile(1.0) / 60:.1f}')
+    print(f'RSS: {samples[0][1] if samples else 0} КиБ -> '
+          f'{samples[-1][1] if samples else 0} КиБ (рост {growth} КиБ)')
+    for moment, rss in samples[::max(1, len(samples) // 8)]:
+        hours = (moment - clock.start) / HOUR
+        print(f'  {hours:6.1f} ч: {rss} КиБ')
+    return 1 if missed or duplicates else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--homeworks', type=int, default=3)
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--factor', type=float, default=3600,
+                        help='во сколько раз модельное время быстрее')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='задержка ответа API, реальные секунды')
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='доля ответов 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='доля ответов 429')
+    parser.add_argument('--padding', type=int, default=0,
+                        help='неизменных домашек в каждом ответе')
+    parser.add_argument('--workers', type=int, default=engine.MAX_WORKERS)
+    args = parser.parse_args()
+
+    quiet_logging(homework)
+    result = asyncio.run(soak(args))
+    raise SystemExit(report(args, *result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Заглушки API Практикума и Telegram для бенчмарков.
+
+Устроены как MockResponseGET и MockTelegramBot из tests/test_bot.py,
+но без проверок внутри, чтобы не искажать замеры.
+"""
+import json
+import logging
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+CURRENT_DATE = 1581604970
+
+
+def make_homework(number):
+    """Домашка в формате ответа API."""
+    return {
+        'id': number,
+        'status': ('approved', 'reviewing', 'rejected')[number % 3],
+        'homework_name': f'student__hw{number}.zip',
+        'reviewer_comment': 'Всё нравится, работа принята.',
+        'date_updated': '2020-02-13T14:40:57Z',
+        'lesson_name': 'Итоговый проект',
+    }
+
+
+def make_body(size):
+    """Тело ответа API с size домашками в байтах."""
+    return json.dumps({
+        'homeworks': [make_homework(number) for number in range(size)],
+        'current_date': CURRENT_DATE,
+    }, ensure_ascii=False).encode()
+
+
+class MockResponseGET:
+
+    def __init__(self, content, status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class MockSession:
+
+    def __init__(self, content, status_code=200):
+        self.response = MockResponseGET(content, status_code)
+
+    def get(self, url, params=None, **kwargs):
+        return self.response
+
+    def head(self, url, **kwargs):
+        return self.response
+
+    def close(self):
+        pass
+
+
+class MockTelegramBot:
+
+    def __init__(self, token=None, **kwargs):
+        self.sent = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent += 1
+
+
+def quiet_logging(module):
+    """Записи лога создаются как в работе, но никуда не пишутся."""
+    module.log_pipeline.stop()
+    module.logger.handlers = [logging.NullHandler()]
+    module.logger.setLevel(logging.INFO)
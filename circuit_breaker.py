@@ -0,0 +1,123 @@
+import threading
+import time
+
+from exceptions import CircuitOpenError, HTTPConnectionError, JSONConvertError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 60
+
+
+class RetryPolicy:
+    """Какие ошибки повторять и сколько раз.
+
+    Сетевые ошибки и не-JSON в ответе (страница ошибки прокси) говорят
+    о недоступности API: запрос повторяется и сбой учитывается
+    предохранителем. Остальные ошибки, например JSONContentError,
+    означают, что API отвечает, и сразу передаются вызывающему.
+    """
+
+    def __init__(self, retryable=(HTTPConnectionError, JSONConvertError),
+                 attempts=2, delay=1.0):
+        self.retryable = retryable
+        self.attempts = attempts
+        self.delay = delay
+
+    def is_retryable(self, error):
+        return isinstance(error, self.retryable)
+
+
+class CircuitBreaker:
+    """Предохранитель вокруг запросов к одному эндпоинту.
+
+    После failure_threshold сбоев подряд предохранитель размыкается,
+    и запросы отклоняются CircuitOpenError без обращения к API. Через
+    reset_timeout секунд пропускается ровно один пробный запрос: его
+    результат замыкает предохранитель или снова размыкает его для всех
+    подписок сразу.
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT, policy=None, logger=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.policy = policy or RetryPolicy()
+        self.logger = logger
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def call(self, func, *args):
+        """Вызов func через предохранитель с повторами по политике."""
+        self.before_call()
+        for attempt in range(1, self.policy.attempts + 1):
+            try:
+                result = func(*args)
+            except Exception as error:
+                if not self.policy.is_retryable(error):
+                    self.on_success()
+                    raise
+                if attempt == self.policy.attempts or self.state != CLOSED:
+                    self.on_failure()
+                    raise
+                time.sleep(self.policy.delay)
+            else:
+                self.on_success()
+                return result
+
+    def before_call(self):
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return
+        raise CircuitOpenError(
+            f'Запросы к {self.name} приостановлены после серии сбоев.',
+            max(remaining, 0) or self.reset_timeout
+        )
+
+    def on_success(self):
+        with self.lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self.failures = 0
+            self.probing = False
+        if recovered and self.logger:
+            self.logger.info('Запросы к %s возобновлены.', self.name)
+
+    def on_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == CLOSED and self.failures < self.failure_threshold:
+                return
+            opened = self.state == CLOSED
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        if opened and self.logger:
+            self.logger.error(
+                '%s недоступен: запросы приостановлены на %s с.',
+                self.name, self.reset_timeout,
+                extra={'error_type': 'CircuitOpenError'}
+            )
+
+
+breakers = {}
+
+
+def breaker_for(name, **kwargs):
+    """Общий предохранитель для всех подписок одного эндпоинта."""
+    breaker = breakers.get(name)
+    if breaker is None:
+        breaker = breakers.setdefault(name, CircuitBreaker(name, **kwargs))
+    return breaker
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import Counter
+
+from http_client import ResponseCache
+from metrics import COALESCED
+
+# Сколько секунд готовый ответ отдаётся подпискам с тем же токеном
+# и курсором без нового запроса к API.
+COALESCE_TTL = 30
+
+
+class Flight:
+    """Запрос к API, результат которого ждут все подписки группы."""
+
+    __slots__ = ('event', 'result', 'error', 'finished_at')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class TokenGroup:
+    """Общие для подписок с одним токеном валидаторы и последний ответ."""
+
+    __slots__ = ('cache', 'body')
+
+    def __init__(self):
+        self.cache = ResponseCache()
+        self.body = None
+
+
+class Coalescer:
+    """Объединение запросов подписок, которые следят за одним токеном.
+
+    Одновременные запросы с тем же токеном и from_date выполняются
+    одним обращением к API, его разобранный ответ получают все
+    подписки. Готовый ответ ещё ttl секунд отдаётся без запроса.
+    Подписки с уникальным токеном работают как раньше.
+    """
+
+    def __init__(self, tenants, ttl=COALESCE_TTL):
+        self.ttl = ttl
+        counts = Counter(tenant.token for tenant in tenants)
+        self.groups = {
+            token: TokenGroup() for token, count in counts.items()
+            if count > 1
+        }
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def shared(self, token):
+        """Есть ли у токена другие подписки."""
+        return token in self.groups
+
+    def fetch(self, token, current_date, request):
+        """Ответ API для токена и курсора, запрос выполняется один раз.
+
+        request(cache) делает сам запрос с валидаторами группы. Если API
+        ответил, что данные не изменились, подписки получают последний
+        ответ группы: кто-то из них мог его ещё не обработать.
+        """
+        key = (token, current_date)
+        now = time.monotonic()
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None or (
+                flight.finished_at is not None
+                and now - flight.finished_at >= self.ttl
+            )
+            if leader:
+                self.expire(now)
+                flight = self.flights[key] = Flight()
+
+        if not leader:
+            COALESCED.inc('hit')
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        COALESCED.inc('miss')
+        group = self.groups[token]
+        try:
+            body = request(group.cache)
+            if body is None:
+                body = group.body
+            else:
+                group.body = body
+            flight.result = body
+        except Exception as error:
+            flight.error = error
+            with self.lock:
+                # Ошибку не кэшируем: следующий опрос пойдёт в API заново.
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+            raise
+        finally:
+            flight.finished_at = time.monotonic()
+            flight.event.set()
+        return body
+
+    def expire(self, now):
+        """Удаление завершённых запросов старше ttl; вызывается под lock."""
+        expired = [
+            key for key, flight in self.flights.items()
+            if flight.finished_at is not None
+            and now - flight.finished_at >= self.ttl
+        ]
+        for key in expired:
+            del self.flights[key]
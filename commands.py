@@ -0,0 +1,127 @@
+import threading
+from datetime import datetime
+
+from homework import HOMEWORK_STATUSES, logger
+
+# Long polling Telegram: запрос висит до LONG_POLL_TIMEOUT секунд, пока
+# не придёт команда, поэтому для него выделен отдельный поток.
+LONG_POLL_TIMEOUT = 30
+ERROR_DELAY = 5
+TIME_FORMAT = '%d.%m.%Y %H:%M'
+
+
+def format_time(timestamp):
+    """Время в читаемом виде или прочерк, если его нет."""
+    if timestamp is None:
+        return '—'
+    return datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)
+
+
+def render_status(chat):
+    """Ответ на /status: текущие статусы домашек и время проверки."""
+    lines = [
+        f'Последняя проверка: {format_time(chat.checked_at)}.',
+        f'Изменения учтены по: {format_time(chat.current_date)}.',
+    ]
+    if not chat.homeworks:
+        lines.append('С момента запуска бота статусы домашек не менялись.')
+    for name, status in chat.homeworks.items():
+        verdict = HOMEWORK_STATUSES.get(status, status)
+        lines.append(f'"{name}": {verdict}')
+    return '\n'.join(lines)
+
+
+def render_history(chat):
+    """Ответ на /history: последние изменения статусов, новые сверху."""
+    if not chat.history:
+        return 'История изменений пока пуста.'
+    return '\n'.join(
+        f'{format_time(changed_at)} "{name}": '
+        f'{HOMEWORK_STATUSES.get(status, status)}'
+        for changed_at, name, status in reversed(chat.history)
+    )
+
+
+COMMANDS = {
+    '/status': render_status,
+    '/history': render_history,
+}
+
+
+class CommandServer:
+    """Ответы на команды бота из кэша статусов через long polling.
+
+    Long polling выполняется в отдельном фоновом потоке, который не
+    задерживает остановку процесса. Ответы ставятся в общую очередь
+    Outbox и подчиняются тем же ограничениям частоты, что и уведомления.
+    """
+
+    def __init__(self, bot, cache, outbox, timeout=LONG_POLL_TIMEOUT):
+        self.bot = bot
+        self.cache = cache
+        self.outbox = outbox
+        self.timeout = timeout
+        self.offset = None
+        self.stopped = threading.Event()
+
+    def start(self, loop):
+        """Запуск фонового потока; команды обрабатываются в цикле loop."""
+        thread = threading.Thread(
+            target=self.poll_updates, args=(loop,),
+            name='commands', daemon=True
+        )
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Прекращение приёма команд."""
+        self.stopped.set()
+
+    def poll_updates(self, loop):
+        """Цикл получения обновлений от Telegram в фоновом потоке."""
+        while not self.stopped.is_set():
+            try:
+                updates = self.get_updates()
+            except Exception as error:
+                logger.warning(
+                    'Не удалось получить команды от Telegram: %s', error
+                )
+                self.stopped.wait(ERROR_DELAY)
+                continue
+            for update in updates:
+                self.offset = update.update_id + 1
+                if self.stopped.is_set():
+                    return
+                try:
+                    loop.call_soon_threadsafe(self.handle, update)
+                except RuntimeError:
+                    # Цикл событий уже закрыт.
+                    return
+
+    def get_updates(self):
+        """Один запрос long polling к Telegram."""
+        return self.bot.get_updates(
+            offset=self.offset,
+            timeout=self.timeout,
+            allowed_updates=['message']
+        )
+
+    def handle(self, update):
+        """Ответ на команду из обновления, остальное пропускается."""
+        message = update.message
+        if message is None or not message.text:
+            return
+        command = message.text.split()[0].split('@')[0]
+        render = COMMANDS.get(command)
+        if render is None:
+            return
+        chat_id = message.chat_id
+        self.outbox.put(chat_id, self.reply(chat_id, render))
+        logger.info('Получена команда %s.', command)
+
+    def reply(self, chat_id, render):
+        """Текст ответа для чата по данным кэша."""
+        chat = self.cache.get(chat_id)
+        if chat is None:
+            return 'Для этого чата нет данных: подписка не найдена.'
+        return render(chat)
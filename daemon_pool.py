@@ -0,0 +1,77 @@
+import queue
+import threading
+from concurrent.futures import Executor, Future
+
+
+class DaemonThreadPool(Executor):
+    """Пул потоков-демонов с интерфейсом ThreadPoolExecutor.
+
+    Потоки ThreadPoolExecutor интерпретатор дожидается при выходе, даже
+    после shutdown(wait=False): зависший запрос к API задержал бы выход
+    процесса на весь таймаут. Потоки-демоны завершаются вместе с ним,
+    поэтому задачи, которые могут не успеть к остановке, нужно отменять
+    до выхода и не полагаться на их результат.
+    """
+
+    def __init__(self, max_workers, thread_name_prefix='pool'):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self.tasks = queue.SimpleQueue()
+        self.idle = threading.Semaphore(0)
+        self.threads = []
+        self.stopped = False
+        self.lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self.lock:
+            if self.stopped:
+                raise RuntimeError('Пул потоков уже остановлен.')
+            future = Future()
+            self.tasks.put((future, fn, args, kwargs))
+            self.add_thread()
+        return future
+
+    def add_thread(self):
+        """Новый поток, если свободных нет и лимит не исчерпан."""
+        if self.idle.acquire(timeout=0):
+            return
+        if len(self.threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self.work, daemon=True,
+                name=f'{self.thread_name_prefix}_{len(self.threads)}'
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def work(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            future, fn, args, kwargs = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            del task, future
+            self.idle.release()
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self.lock:
+            self.stopped = True
+            if cancel_futures:
+                while True:
+                    try:
+                        task = self.tasks.get_nowait()
+                    except queue.Empty:
+                        break
+                    if task is not None:
+                        task[0].cancel()
+            for _ in self.threads:
+                self.tasks.put(None)
+        if wait:
+            for thread in self.threads:
+                thread.join()
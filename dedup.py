@@ -0,0 +1,60 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# Около 240 байт на запись (отпечаток, срок и узел OrderedDict): 50 тысяч
+# записей занимают ~12 МБ при любом числе подписок и домашек.
+MAX_ENTRIES = 50_000
+TTL = 60 * 60 * 24
+
+
+def fingerprint(*parts):
+    """Компактный отпечаток ключа: 64-битное число вместо строк."""
+    data = '\x1f'.join(map(str, parts)).encode()
+    return int.from_bytes(
+        hashlib.blake2b(data, digest_size=8).digest(), 'big'
+    )
+
+
+class DedupStore:
+    """Недавно отправленные уведомления и ошибки для отсева повторов.
+
+    Хранятся только отпечатки ключей и сроки их действия. Записей не больше
+    max_entries: при переполнении вытесняется давно не встречавшаяся,
+    а запись старше своего срока считается отсутствующей.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def seen(self, *parts, ttl=None):
+        """Встречался ли ключ за срок ttl; новый ключ запоминается."""
+        key = fingerprint(*parts)
+        now = time.monotonic()
+        with self.lock:
+            expires = self.entries.get(key)
+            if expires is not None and expires > now:
+                self.entries.move_to_end(key)
+                return True
+            self.entries[key] = now + (self.ttl if ttl is None else ttl)
+            self.entries.move_to_end(key)
+            self.evict(now)
+            return False
+
+    def evict(self, now):
+        """Удаление просроченных записей с начала очереди и сверх лимита."""
+        entries = self.entries
+        while entries and (
+            len(entries) > self.max_entries
+            or next(iter(entries.values())) <= now
+        ):
+            entries.popitem(last=False)
+            self.evicted += 1
@@ -0,0 +1,405 @@
+import asyncio
+import contextvars
+import signal
+import time
+
+from homework import ENDPOINT, RETRY_TIME, log_pipeline, logger, poll_tenant
+from circuit_breaker import breaker_for
+from coalescing import Coalescer
+from daemon_pool import DaemonThreadPool
+from commands import CommandServer
+from dedup import DedupStore
+from exceptions import CircuitOpenError
+from http_client import HedgedSession, create_session, warm_up
+from journal import RecordingSession
+from log_config import log_context
+from metrics import CYCLE_DURATION, ERRORS, SLEEP_DRIFT
+from outbox import SPILL_FILE, Outbox
+from scheduler import AdaptivePolicy, Scheduler, phase, spread
+from status_cache import StatusCache
+from timing_wheel import TICK, TimingWheel
+
+# Потоки нужны только под блокирующие вызовы requests и python-telegram-bot,
+# пул общий на все подписки и не растёт вместе с их количеством.
+MAX_WORKERS = 16
+REPORT_INTERVAL = 60 * 60
+# Остановка: сколько ждать уже начатых опросов и досылки сообщений.
+# Вместе меньше секунды, недосланное сохраняется на диск.
+POLL_GRACE = 0.3
+DRAIN_TIMEOUT = 0.5
+# Тик колеса таймеров: не больше секунды и не больше 1/600 интервала
+# опроса, чтобы округление сроков не сдвигало опросы заметно.
+TICKS_PER_INTERVAL = 600
+
+
+class PollingEngine:
+    """Опрос API для множества подписок в одном процессе на asyncio."""
+
+    def __init__(self, tenants, bot, retry_time=RETRY_TIME,
+                 max_workers=MAX_WORKERS, session=None, policy=None,
+                 store=None, outbox=None, stream=False, hedge=False,
+                 commands=False, journal=None, shard=None,
+                 spill_path=SPILL_FILE, dedup=None, profiler=None):
+        self.tenants = list(tenants)
+        self.bot = bot
+        self.retry_time = retry_time
+        self.scheduler = Scheduler(
+            policy or AdaptivePolicy(default=retry_time), retry_time
+        )
+        self.max_workers = max_workers
+        if session is None:
+            # Дублирующим запросам нужны свои соединения в пуле.
+            session = create_session(max_workers * (2 if hedge else 1))
+        if journal is not None:
+            session = RecordingSession(session, journal)
+        if hedge:
+            session = HedgedSession(session, max_workers)
+        self.session = session
+        self.journal = journal
+        self.shard = shard
+        self.dedup = dedup if dedup is not None else DedupStore()
+        self.profiler = profiler
+        self.store = store
+        self.breaker = breaker_for(ENDPOINT, logger=logger)
+        self.stream = stream
+        # Потоки-демоны: запрос, зависший при остановке, не задерживает
+        # выход процесса.
+        self.executor = DaemonThreadPool(
+            max_workers=max_workers,
+            thread_name_prefix='poll'
+        )
+        self.outbox = outbox or Outbox(
+            bot, self.executor, spill_path=spill_path
+        )
+        self.coalescer = Coalescer(self.tenants)
+        self.status_cache = StatusCache()
+        for tenant in self.tenants:
+            self.status_cache.register(tenant.chat_id)
+        self.commands = (
+            CommandServer(bot, self.status_cache, self.outbox)
+            if commands else None
+        )
+        self.tick = min(TICK, retry_time / TICKS_PER_INTERVAL)
+        self.wheel = None
+        self.timers = {}
+        self.cycles = set()
+        self.abandoned = set()
+        self.poll_requested = False
+        # События создаются в serve(), внутри цикла событий.
+        self.stopping = None
+        self.wakeup = None
+
+    def run(self):
+        """Запуск опроса всех подписок до сигнала остановки."""
+        asyncio.run(self.serve())
+
+    def stop(self):
+        """Остановка: ожидания прерываются, начинается досылка."""
+        if self.stopping is not None and not self.stopping.is_set():
+            logger.info('Получен сигнал остановки.')
+            self.stopping.set()
+            self.poll_now()
+
+    def poll_now(self):
+        """Внеочередной опрос всех подписок, которые сейчас ждут."""
+        self.poll_requested = True
+        if self.wakeup is not None:
+            wakeup, self.wakeup = self.wakeup, asyncio.Event()
+            wakeup.set()
+
+    async def sleep(self, delay):
+        """Ожидание до следующего тика; True, если его прервали."""
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), delay)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def handle_signals(self):
+        """SIGTERM и SIGINT останавливают бот, SIGUSR1 — опрос сейчас.
+
+        При профилировании SIGUSR2 записывает профиль на диск.
+        """
+        loop = asyncio.get_running_loop()
+        handlers = {'SIGTERM': self.stop, 'SIGINT': self.stop,
+                    'SIGUSR1': self.poll_now}
+        if self.profiler is not None:
+            handlers['SIGUSR2'] = self.profiler.dump
+        for name, handler in handlers.items():
+            try:
+                loop.add_signal_handler(getattr(signal, name), handler)
+            except (AttributeError, NotImplementedError, RuntimeError):
+                # Нет такого сигнала на платформе или цикл не в главном
+                # потоке: остаётся остановка через stop().
+                pass
+
+    async def serve(self):
+        """Опрос подписок по колесу таймеров до вызова stop()."""
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        self.wakeup = asyncio.Event()
+        await self.restore()
+        await self.warm_up()
+        self.handle_signals()
+        background = [
+            asyncio.ensure_future(self.outbox.run()),
+            asyncio.ensure_future(self.report_loop()),
+        ]
+        if self.shard is not None:
+            await self.rebalance()
+            background.append(asyncio.ensure_future(self.lease_loop()))
+        if self.commands is not None:
+            self.commands.start(loop)
+        # Первый опрос сдвинут на постоянную для токена долю интервала:
+        # опросы распределены равномерно, подписки с общим токеном
+        # совпадают и их запросы объединяются.
+        now = loop.time()
+        self.wheel = TimingWheel(self.tick, now)
+        for tenant in self.tenants:
+            self.timers[tenant] = self.wheel.schedule(
+                now + self.retry_time * phase(tenant.token), tenant
+            )
+        dispatcher = asyncio.ensure_future(self.dispatch())
+        try:
+            await self.stopping.wait()
+        finally:
+            await self.shutdown(dispatcher, background)
+
+    async def shutdown(self, dispatcher, background):
+        """Досылка сообщений, сохранение курсоров и освобождение ресурсов.
+
+        Опросы, не завершившиеся за POLL_GRACE, отменяются: их курсор
+        остаётся прежним. Сообщения, не отправленные за DRAIN_TIMEOUT,
+        сохраняются на диск и будут отправлены после перезапуска.
+        """
+        started = time.monotonic()
+        self.stopping.set()
+        self.poll_now()
+        if self.commands is not None:
+            self.commands.stop()
+        dispatcher.cancel()
+        cycles = list(self.cycles)
+        if cycles:
+            _, pending = await asyncio.wait(cycles, timeout=POLL_GRACE)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*cycles, return_exceptions=True)
+        await asyncio.gather(dispatcher, return_exceptions=True)
+        await self.outbox.drain(DRAIN_TIMEOUT)
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+
+        logger.info(self.scheduler.report())
+        self.executor.shutdown(wait=False)
+        self.session.close()
+        if self.store is not None:
+            self.store.close(self.owned_state())
+        if self.shard is not None:
+            # Курсоры уже записаны: подписки можно сразу отдать другим.
+            self.shard.close()
+        if self.journal is not None:
+            self.journal.close()
+        if self.profiler is not None:
+            self.profiler.close()
+        logger.info(
+            f'Бот остановлен за {time.monotonic() - started:.2f} с.'
+        )
+
+    async def restore(self):
+        """Загрузка сохранённых курсоров и статусов подписок."""
+        if self.store is None:
+            return
+        loop = asyncio.get_running_loop()
+        restored = await loop.run_in_executor(
+            self.executor, self.store.load, self.tenants
+        )
+        self.restore_status_cache(self.tenants)
+        logger.info(f'Восстановлено курсоров подписок: {restored}.')
+
+    def restore_status_cache(self, tenants):
+        """Статусы восстановленных подписок для команд бота."""
+        for tenant in tenants:
+            self.status_cache.restore(
+                tenant.chat_id, tenant.named_homeworks(), tenant.current_date
+            )
+
+    async def warm_up(self):
+        """Открытие соединений пула до первого цикла опроса."""
+        loop = asyncio.get_running_loop()
+        connections = min(self.max_workers, len(self.tenants))
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                self.executor, warm_up, self.session, ENDPOINT
+            )
+            for _ in range(connections)
+        ))
+        logger.info(
+            f'Открыто соединений с API: {sum(results)} из {connections}.'
+        )
+
+    async def dispatch(self):
+        """Запуск опросов, срок которых подошёл, раз в тик колеса."""
+        loop = asyncio.get_running_loop()
+        while not self.stopping.is_set():
+            if self.poll_requested:
+                self.poll_requested = False
+                for tenant, timer in list(self.timers.items()):
+                    self.wheel.cancel(timer)
+                    self.start_cycle(tenant)
+            now = loop.time()
+            for timer in self.wheel.advance(now):
+                SLEEP_DRIFT.observe(max(0, now - timer.when))
+                self.start_cycle(timer.item)
+            await self.sleep(self.wheel.next_tick() - loop.time())
+
+    def start_cycle(self, tenant):
+        """Запуск цикла опроса подписки отдельной задачей."""
+        self.timers.pop(tenant, None)
+        task = asyncio.ensure_future(self.cycle(tenant))
+        self.cycles.add(task)
+        task.add_done_callback(self.cycles.discard)
+
+    async def cycle(self, tenant):
+        """Один опрос подписки и постановка следующего в колесо.
+
+        Подписки, аренды которых у воркера нет, не опрашиваются, но
+        остаются в колесе на случай, если аренда перейдёт к нему.
+        """
+        if self.shard is not None and not self.shard.owns(tenant.key):
+            delay = self.retry_time
+        else:
+            logger.info('--- Новый запрос ------------->>>')
+            with CYCLE_DURATION.time():
+                error = await self.poll(tenant)
+            if self.stopping.is_set():
+                return
+            delay = self.scheduler.next_delay(tenant, error)
+        delay *= spread(tenant.token)
+        self.timers[tenant] = self.wheel.schedule(
+            asyncio.get_running_loop().time() + delay, tenant
+        )
+
+    async def lease_loop(self):
+        """Периодическое продление аренды подписок."""
+        while True:
+            await asyncio.sleep(self.shard.renew_interval)
+            await self.rebalance()
+
+    async def rebalance(self):
+        """Продление аренды и загрузка состояния перешедших подписок."""
+        loop = asyncio.get_running_loop()
+        try:
+            gained = await loop.run_in_executor(
+                self.executor, self.shard.rebalance, self.tenants
+            )
+        except Exception as error:
+            # Без продления аренда истечёт, и опрос подписок прекратится
+            # раньше, чем их заберёт другой воркер.
+            logger.warning('Не удалось продлить аренду подписок: %s', error)
+            return
+        if not gained:
+            return
+        if self.store is not None:
+            for tenant in gained:
+                tenant.homeworks = {}
+                tenant.names = {}
+                tenant.changed_at = None
+            await loop.run_in_executor(
+                self.executor, self.store.load, gained
+            )
+            self.restore_status_cache(gained)
+        logger.info(
+            'Воркер %s получил подписок: %d, всего у него: %d.',
+            self.shard.worker, len(gained), len(self.shard.owned)
+        )
+
+    async def report_loop(self):
+        """Периодический вывод статистики планировщика в лог."""
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            logger.info(self.scheduler.report())
+            if log_pipeline.dropped:
+                logger.warning(
+                    'Отброшено записей лога: %d.', log_pipeline.dropped
+                )
+
+    async def poll_all(self):
+        """Однократный опрос всех подписок."""
+        await asyncio.gather(*(self.poll(tenant) for tenant in self.tenants))
+
+    async def poll(self, tenant):
+        """Запрос к API для подписки и постановка сообщений в очередь.
+
+        Возвращает возникшую ошибку или None.
+        """
+        loop = asyncio.get_running_loop()
+        tenant.cycle += 1
+        log_context.set((tenant.key, tenant.cycle))
+        # Записи лога из пула потоков тоже получают подписку и цикл.
+        context = contextvars.copy_context()
+        call = (poll_tenant,)
+        if self.profiler is not None:
+            call = (self.profiler.run, poll_tenant)
+        try:
+            try:
+                messages = await loop.run_in_executor(
+                    self.executor, context.run, *call,
+                    tenant, self.session, self.stream, self.breaker,
+                    self.status_cache, self.coalescer, self.dedup
+                )
+            except asyncio.CancelledError:
+                # Поток опроса ещё меняет подписку: её состояние при
+                # остановке не записывается, курсор остаётся прежним.
+                self.abandoned.add(tenant.key)
+                raise
+            if self.shard is not None and not self.shard.owns(tenant.key):
+                # Аренда истекла во время запроса: подписку уже может
+                # опрашивать другой воркер, уведомит он.
+                logger.warning('Аренда подписки потеряна во время опроса.')
+                return None
+            for message in messages:
+                self.outbox.put(tenant.chat_id, message)
+            # Отправленные статусы воркер записывает сразу: после его
+            # падения другой воркер не повторит уведомления.
+            await self.save(
+                tenant, force=bool(messages) and self.shard is not None
+            )
+        except CircuitOpenError as error:
+            # О размыкании предохранитель уже сообщил один раз для всех.
+            ERRORS.inc(type(error).__name__)
+            logger.debug('Опрос отложен: %s', error)
+            return error
+        except Exception as error:
+            ERRORS.inc(type(error).__name__)
+            logger.error(
+                'Сбой в работе программы: "%s"', error,
+                extra={'error_type': type(error).__name__}
+            )
+            return error
+        return None
+
+    def owned_state(self):
+        """Фильтр подписок, состояние которых можно записать.
+
+        Подписку без аренды уже опрашивает другой воркер, и её курсор
+        в памяти устарел: запись затёрла бы его состояние в базе. Так же
+        пропускаются подписки, опрос которых прервала остановка.
+        """
+        owns = None if self.shard is None else self.shard.owns
+        if not self.abandoned:
+            return owns
+        abandoned = self.abandoned
+        return lambda key: key not in abandoned and (
+            owns is None or owns(key)
+        )
+
+    async def save(self, tenant, force=False):
+        """Сохранение курсора и статусов подписки пачками."""
+        if self.store is None:
+            return
+        if self.store.update(tenant) or force:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self.executor, self.store.flush, self.owned_state()
+            )
@@ -1,18 +1,46 @@
-class HTTPConnectionError(Exception):
-    """Ошибка подключения к API."""
-    pass
-
-
-class JSONConvertError(Exception):
-    """Ошибка преобразования ответа от API в JSON."""
-    pass
-
-
-class JSONContentError(Exception):
-    """Ошибка в содержимом JSON'а."""
-    pass
-
-
-class ParsingError(Exception):
-    """Ошибка при распознавании данных."""
-    pass
+class HTTPConnectionError(Exception):
+    """Ошибка подключения к API."""
+    pass
+
+
+class HTTPClientError(Exception):
+    """API отклонил запрос подписки: неверный или отозванный токен."""
+    pass
+
+
+class JSONConvertError(Exception):
+    """Ошибка преобразования ответа от API в JSON."""
+    pass
+
+
+class JSONContentError(Exception):
+    """Ошибка в содержимом JSON'а."""
+    pass
+
+
+class ParsingError(Exception):
+    """Ошибка при распознавании данных."""
+    pass
+
+
+class TenantsConfigError(Exception):
+    """Ошибка в файле со списком подписок."""
+    pass
+
+
+class ResponseTypeError(JSONContentError, TypeError):
+    """Ответ от API имеет некорректный тип."""
+    pass
+
+
+class CircuitOpenError(HTTPConnectionError):
+    """Запросы к API приостановлены после серии сбоев."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class HTTPTimeoutError(HTTPConnectionError):
+    """Превышено время ожидания ответа от API."""
+    pass
@@ -1,50 +1,68 @@
+import functools
 import json
 import logging
 import os
-import requests
 import sys
-import telegram
 import time
+from collections import ChainMap
 
-from dotenv import load_dotenv
-from logging.handlers import RotatingFileHandler
-from logging import StreamHandler
-
-from exceptions import (HTTPConnectionError,
+from exceptions import (HTTPClientError,
+                        HTTPConnectionError,
+                        HTTPTimeoutError,
                         JSONConvertError,
                         JSONContentError,
-                        ParsingError)
-
+                        ParsingError,
+                        ResponseTypeError)
+
+from http_client import Deadline
+from json_stream import CHUNK_SIZE, HomeworkStream
+from log_config import LogPipeline, setup_logging
+from metrics import (API_LATENCY, API_RESPONSES, ERRORS, JSON_DECODE,
+                     start_metrics_server)
+from schema import validate_homeworks
 from telegram_handler import TelegramHandler
-
-load_dotenv()
-PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
-TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
-
-
+from tenants import Tenant, homework_key, load_tenants
+
+
+def load_config():
+    """Чтение настроек из переменных окружения."""
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID
+    global TENANTS_FILE, STATE_FILE, STREAM_RESPONSES, METRICS_PORT
+    global HEDGE_REQUESTS, RECORD_FILE, WORKERS, LEASE_FILE
+    global PROFILE_FILE, PROFILE_CYCLES
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
+    TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+    TENANTS_FILE = os.getenv('TENANTS_FILE')
+    STATE_FILE = os.getenv('STATE_FILE', 'homework_bot.sqlite3')
+    STREAM_RESPONSES = bool(os.getenv('STREAM_RESPONSES'))
+    METRICS_PORT = os.getenv('METRICS_PORT')
+    HEDGE_REQUESTS = bool(os.getenv('HEDGE_REQUESTS'))
+    RECORD_FILE = os.getenv('RECORD_FILE')
+    WORKERS = int(os.getenv('WORKERS', 1))
+    LEASE_FILE = os.getenv('LEASE_FILE', STATE_FILE)
+    PROFILE_FILE = os.getenv('PROFILE_FILE')
+    PROFILE_CYCLES = int(os.getenv('PROFILE_CYCLES', 100))
+
+
+load_config()
+
+# До bootstrap() записи лога копятся в очереди LogPipeline: импорт модуля
+# не создаёт файлов и не запускает потоков.
 logger = logging.getLogger(__name__)
-formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
 logger.setLevel(logging.DEBUG)
-
-rf_handler = RotatingFileHandler(
-    'homework_bot.log',
-    maxBytes=50_000,
-    backupCount=1
-)
-rf_handler.setLevel(logging.DEBUG)
-rf_handler.setFormatter(formatter)
-logger.addHandler(rf_handler)
-
-s_handler = StreamHandler(sys.stdout)
-s_handler.setLevel(logging.DEBUG)
-s_handler.setFormatter(formatter)
-logger.addHandler(s_handler)
+log_pipeline = LogPipeline(logger)
 
 
 RETRY_TIME = 60 * 10
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+# Таймауты запроса к API: на соединение и на чтение ответа. Бюджет цикла
+# ограничивает опрос подписки целиком, вместе с повторами.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+CYCLE_BUDGET = 30
+# Коды 4xx, которые говорят о перегрузке API, а не об ошибке подписки.
+TRANSIENT_STATUSES = (408, 429)
 
 
 HOMEWORK_STATUSES = {
@@ -54,61 +72,159 @@ HOMEWORK_STATUSES = {
 }
 
 
+@functools.lru_cache(maxsize=None)
+def bootstrap():
+    """Однократная подготовка к работе: файл .env и обработчики лога."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    load_config()
+    setup_logging(log_pipeline)
+
+
 def send_message(bot, message):
     """Отправка сформированного сообщения в Telegram с помощью бота."""
+    send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message):
+    """Отправка сообщения в указанный чат Telegram с помощью бота."""
     try:
         bot.send_message(
-            chat_id=TELEGRAM_CHAT_ID,
+            chat_id=chat_id,
             text=message
         )
         logger.info('Бот успешно отправил сообщение в Telegram.')
     except Exception as error:
         logger.error(
-            f'Боту не удалось отправить сообщение в Telegram. {error}'
+            'Боту не удалось отправить сообщение в Telegram. %s', error
         )
 
 
 def get_api_answer(current_timestamp):
     """Запрос домашек у API Яндекс.Практикума и преобразование в JSON."""
+    headers = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+    return request_api_answer(headers, current_timestamp)
+
+
+def request_api_answer(headers, current_timestamp, session=None,
+                       cache=None, deadline=None):
+    """Запрос домашек у API с указанными заголовками авторизации.
+
+    С кэшем валидаторов запрос становится условным: если ответ не изменился
+    с прошлого раза, возвращается None и JSON не разбирается.
+    """
+    response = api_request(
+        headers, current_timestamp, session, cache, deadline=deadline
+    )
+    if response is None:
+        return None
+
+    try:
+        with JSON_DECODE.time():
+            response = response.json()
+    except json.decoder.JSONDecodeError:
+        raise JSONConvertError('Не удалось преобразовать ответ от API в JSON.')
+    else:
+        logger.info('Ответ от API преобразован в JSON.')
+
+    return response
+
+
+def stream_api_answer(headers, current_timestamp, session=None,
+                      cache=None, deadline=None):
+    """Запрос домашек с потоковым разбором ответа.
+
+    Возвращает HomeworkStream: домашки читаются по мере получения ответа,
+    и память не зависит от его размера. Хэш тела в этом режиме не
+    сравнивается, условные запросы по ETag/Last-Modified работают.
+    """
+    response = api_request(
+        headers, current_timestamp, session, cache, stream=True,
+        deadline=deadline
+    )
+    if response is None:
+        return None
+    return HomeworkStream(response.iter_content(CHUNK_SIZE), response.close)
+
+
+def api_request(headers, current_timestamp, session, cache, stream=False,
+                deadline=None):
+    """HTTP-запрос к API; None, если ответ не изменился с прошлого раза.
+
+    Без session запрос выполняется через requests.get. Таймауты запроса
+    не выходят за остаток бюджета deadline.
+    """
+    import requests
+
+    if session is None:
+        session = requests
     timestamp = current_timestamp or int(time.time())
     params = {'from_date': timestamp}
+    if cache is not None:
+        headers = {**headers, **cache.conditional_headers()}
+    timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    if deadline is not None:
+        timeout = deadline.timeout(*timeout)
 
     try:
-        response = requests.get(ENDPOINT, headers=HEADERS, params=params)
+        with API_LATENCY.time():
+            response = session.get(
+                ENDPOINT, headers=headers, params=params, stream=stream,
+                timeout=timeout
+            )
+    except requests.Timeout:
+        API_RESPONSES.inc('timeout')
+        raise HTTPTimeoutError('Превышено время ожидания ответа от API.')
     except requests.RequestException:
+        API_RESPONSES.inc('error')
         raise HTTPConnectionError('Не удалось получить ответ от API.')
     else:
+        API_RESPONSES.inc(str(response.status_code))
         logger.info('Ответ от API получен.')
 
-    if response.status_code != 200:
-        raise HTTPConnectionError('Ответ от API не верный.')
+    not_modified = (
+        cache is not None and cache.not_modified(response, not stream)
+    )
+    if response.status_code == 200 and not not_modified:
+        return response
+    if stream:
+        # Непрочитанный потоковый ответ держит соединение из пула.
+        response.close()
+    if not_modified:
+        logger.info('Ответ от API не изменился.')
+        return None
+    raise response_error(response.status_code)
 
-    try:
-        response = response.json()
-    except json.decoder.JSONDecodeError:
-        raise JSONConvertError('Не удалось преобразовать ответ от API в JSON.')
-    else:
-        logger.info('Ответ от API преобразован в JSON.')
 
-    return response
+def response_error(status_code):
+    """Ошибка для ответа API с кодом, отличным от 200.
+
+    Прочие 4xx относятся к одной подписке: такой запрос не повторяется
+    и не размыкает предохранитель, общий для всех подписок.
+    """
+    if 400 <= status_code < 500 and status_code not in TRANSIENT_STATUSES:
+        return HTTPClientError(f'API отклонил запрос с кодом {status_code}.')
+    return HTTPConnectionError('Ответ от API не верный.')
 
 
 def check_response(response):
-    """Проверка запроса к API на корректность и извлечение списка домашек."""
-    if not isinstance(response['homeworks'], list):
-        logger.error('В ответе от API нет списка домашек.')
-        raise JSONContentError('В ответе от API нет списка домашек.')
+    """Проверка запроса к API на корректность и извлечение списка домашек.
 
+    Все домашки проверяются по HOMEWORK_SCHEMA за один проход.
+    """
     try:
         homeworks = response['homeworks']
+    except KeyError:
+        raise JSONContentError('В ответе от API нет списка домашек.')
     except TypeError:
-        raise JSONContentError('Не удалось получить домашки из ответа от API.')
-    else:
-        logger.info('Список домашек в ответе от API получен.')
+        raise ResponseTypeError('Ответ от API имеет некорректный тип.')
 
-    if homeworks and not isinstance(homeworks[0], dict):
-        raise JSONContentError('Содержимое списка домашек некорректно.')
+    if type(homeworks) is not list:
+        raise JSONContentError('В ответе от API нет списка домашек.')
 
+    validate_homeworks(homeworks)
+    logger.info('Список домашек в ответе от API получен.')
     return homeworks
 
 
@@ -133,13 +249,18 @@ def parse_status(homework):
 
 
 def check_tokens():
-    """Проверка доступности переменных окружения."""
-    ENV_VARS = {
-        PRACTICUM_TOKEN: 'PRACTICUM_TOKEN',
-        TELEGRAM_TOKEN: 'TELEGRAM_TOKEN',
-        TELEGRAM_CHAT_ID: 'TELEGRAM_CHAT_ID',
-    }
-    for env_var, name in ENV_VARS.items():
+    """Проверка доступности переменных окружения.
+
+    С TENANTS_FILE токены Практикума берутся из файла подписок,
+    и PRACTICUM_TOKEN не нужен.
+    """
+    ENV_VARS = (
+        ('TELEGRAM_TOKEN', TELEGRAM_TOKEN),
+        ('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID),
+    )
+    if not TENANTS_FILE:
+        ENV_VARS = (('PRACTICUM_TOKEN', PRACTICUM_TOKEN),) + ENV_VARS
+    for name, env_var in ENV_VARS:
         if env_var is None:
             logger.critical(
                 f'Отсутствует обязательная переменная окружения: \'{name}\'. '
@@ -150,66 +271,225 @@ def check_tokens():
     return True
 
 
-def main():
-    """Основная логика работы бота."""
-    logger.info('--- Старт программы ---------->>>')
+def diff_homeworks(index, homeworks, changed=None):
+    """Сообщения об изменившихся статусах домашек за один проход по списку.
+
+    index — словарь {id или имя домашки: последний статус}, обновляется
+    на месте. Сообщения формируются только для домашек, чей статус
+    изменился, поэтому одновременные изменения нескольких работ
+    не теряются. Сами изменившиеся домашки добавляются в список changed.
+    """
+    messages = []
+    for homework in homeworks:
+        key = homework_key(homework)
+        status = homework.get('status')
+        if key in index and index[key] == status:
+            continue
+        try:
+            message = parse_status(homework)
+        except (ParsingError, KeyError) as error:
+            ERRORS.inc(type(error).__name__)
+            logger.error(
+                'Сбой в работе программы: "%s"', error,
+                extra={'error_type': type(error).__name__}
+            )
+            continue
+        index[key] = status
+        messages.append(message)
+        if changed is not None:
+            changed.append(homework)
+    return messages
+
+
+def notification_key(tenant, homework):
+    """Ключ уведомления для отсева повторов: чат, домашка и статус.
+
+    id домашки уникален во всём API, а имя — только у одного студента.
+    Дата обновления в ключе: повторная смена статуса на прежний (снова
+    «на проверке» после замечаний) остаётся новым уведомлением.
+    """
+    homework_id = homework.get('id')
+    if homework_id is None:
+        homework_id = (tenant.key, homework.get('homework_name'))
+    return (tenant.chat_id, homework_id, homework.get('status'),
+            homework.get('date_updated'))
+
+
+def fetch_response(tenant, session=None, stream=False, breaker=None,
+                   coalescer=None):
+    """Ответ API для подписки.
+
+    С breaker запрос выполняется через общий предохранитель эндпоинта,
+    с coalescer запросы подписок с общим токеном объединяются в один.
+    Потоковый ответ читается один раз и не объединяется. Все попытки
+    укладываются в бюджет CYCLE_BUDGET.
+    """
+    fetch = stream_api_answer if stream else request_api_answer
+    deadline = Deadline(CYCLE_BUDGET)
+
+    def request(cache):
+        args = (tenant.headers, tenant.current_date, session, cache, deadline)
+        if breaker is not None:
+            return breaker.call(fetch, *args)
+        return fetch(*args)
+
+    if coalescer is None or stream or not coalescer.shared(tenant.token):
+        return request(tenant.cache)
+    return coalescer.fetch(tenant.token, tenant.current_date, request)
+
+
+def poll_tenant(tenant, session=None, stream=False, breaker=None,
+                status_cache=None, coalescer=None, dedup=None):
+    """Один цикл опроса API для подписки: список новых сообщений.
+
+    В status_cache записываются изменения для команд бота. Сообщения,
+    которые чат уже получал (по dedup), отбрасываются.
+    """
+    response = fetch_response(tenant, session, stream, breaker, coalescer)
+    changed = []
+    if response is None:
+        if status_cache is not None:
+            status_cache.update(tenant.chat_id, changed, tenant.current_date)
+        return []
+
+    if stream:
+        # Статусы пишутся в индекс только после разбора всего ответа:
+        # при ошибке в середине повтор снова найдёт изменения.
+        index = ChainMap({}, tenant.homeworks)
+        try:
+            messages = diff_homeworks(index, response, changed)
+        finally:
+            response.close()
+        tenant.homeworks.update(index.maps[0])
+        response = response.fields
+    else:
+        homeworks = check_response(response)
+        messages = diff_homeworks(tenant.homeworks, homeworks, changed)
+
+    if dedup is not None:
+        messages = [
+            message for message, homework in zip(messages, changed)
+            if not dedup.seen(*notification_key(tenant, homework))
+        ]
+
+    if changed:
+        tenant.record(changed)
+    if messages:
+        logger.info('Сформировано новых сообщений: %d.', len(messages))
+        tenant.changed_at = time.time()
+    else:
+        logger.info('Нет нового сообщения.')
+        if tenant.changed_at is None:
+            # Отсчёт простоя начинается с первого успешного опроса,
+            # иначе подписка без изменений никогда не станет редкой.
+            tenant.changed_at = time.time()
 
-    if not check_tokens():
-        exit()
+    update_cursor(tenant, response)
+    if status_cache is not None:
+        status_cache.update(tenant.chat_id, changed, tenant.current_date)
+    return messages
 
-    current_timestamp = int(time.time())
-    previous_message = None
+
+def update_cursor(tenant, response):
+    """Время следующего запроса подписки из ответа API."""
+    try:
+        tenant.current_date = response['current_date']
+    except KeyError:
+        tenant.current_date = int(time.time())
+        logger.debug(
+            'Не удалось получить время запроса из ответа от API. '
+            'Для выполнения следующего запроса принято текущее время.'
+        )
+    else:
+        logger.info('Время запроса получено из ответа от API.')
+
+
+def get_tenants():
+    """Подписки из файла TENANTS_FILE или одна подписка из окружения."""
+    if TENANTS_FILE:
+        return load_tenants(TENANTS_FILE)
+    return [Tenant(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, int(time.time()))]
+
+
+def run_bot(shard=None, metrics_port=None, record_file=None,
+            spill_file=None, profile_file=None):
+    """Запуск опроса подписок; с shard — только арендованных воркером.
+
+    Команды чата в режиме воркеров выключены: getUpdates для одного
+    токена бота может вызывать только один процесс.
+    """
+    import telegram
+
+    from dedup import DedupStore
+    from engine import PollingEngine
+    from journal import Journal, RecordingBot
+    from outbox import SPILL_FILE
+    from state_store import StateStore
 
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
     logger.info('Связь с ботом установлена.')
-    t_handler = TelegramHandler(bot, TELEGRAM_CHAT_ID)
-    t_handler.setLevel(logging.ERROR)
-    t_handler.setFormatter(formatter)
-    logger.addHandler(t_handler)
+    journal = None
+    if record_file:
+        journal = Journal(record_file)
+        bot = RecordingBot(bot, journal)
+        logger.info('Ответы API и отправки пишутся в %s.', record_file)
+    # Общий отсев повторов для уведомлений и пересылки ошибок.
+    dedup = DedupStore()
+    log_pipeline.add_handler(
+        TelegramHandler(bot, TELEGRAM_CHAT_ID, dedup=dedup), logging.ERROR
+    )
+
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
+        logger.info(f'Метрики доступны на порту {metrics_port}.')
+
+    profiler = None
+    if profile_file:
+        from profiling import Profiler
+
+        profiler = Profiler(profile_file, PROFILE_CYCLES)
+        profiler.start()
+        logger.info(
+            'Профилируются первые %d циклов, профиль: %s.',
+            PROFILE_CYCLES, profile_file
+        )
 
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-
-            if homeworks:
-                message = parse_status(homeworks[0])
-            else:
-                message = 'Обновлений по домашке нет.'
-                logger.debug('Обновлений по домашке нет.')
-
-            if message != previous_message:
-                logger.info('Сформировано новое сообщение.')
-                send_message(bot, message)
-                previous_message = message
-            else:
-                logger.info('Нет нового сообщения.')
-
-            try:
-                current_timestamp = response['current_date']
-            except KeyError:
-                current_timestamp = int(time.time())
-                logger.debug(
-                    'Не удалось получить время запроса из ответа от API. '
-                    'Для выполнения следующего запроса принято текущее время.'
-                )
-            else:
-                logger.info('Время запроса получено из ответа от API.')
-
-            time.sleep(RETRY_TIME)
-            logger.debug(
-                'Программа работает. Предыдущий запрос был выполнен успешно.'
-            )
+    tenants = get_tenants()
+    logger.info(f'Загружено подписок: {len(tenants)}.')
+    PollingEngine(
+        tenants, bot,
+        store=StateStore(STATE_FILE),
+        stream=STREAM_RESPONSES,
+        hedge=HEDGE_REQUESTS,
+        commands=shard is None,
+        journal=journal,
+        shard=shard,
+        dedup=dedup,
+        profiler=profiler,
+        spill_path=spill_file or SPILL_FILE
+    ).run()
 
-        except Exception as error:
-            current_error = f'Сбой в работе программы: "{error}"'
-            logger.error(current_error)
 
-            time.sleep(RETRY_TIME)
+def main():
+    """Основная логика работы бота."""
+    bootstrap()
 
-        finally:
-            logger.info('--- Новый запрос ------------->>>')
+    logger.info('--- Старт программы ---------->>>')
+
+    if not check_tokens():
+        exit()
+
+    if WORKERS > 1:
+        from workers import run_workers
+
+        run_workers(WORKERS)
+    else:
+        run_bot(metrics_port=METRICS_PORT, record_file=RECORD_FILE,
+                profile_file=PROFILE_FILE)
 
 
 if __name__ == '__main__':
+    # engine импортирует функции отсюда: регистрируем модуль под его
+    # настоящим именем, чтобы он не выполнился повторно.
+    sys.modules.setdefault('homework', sys.modules[__name__])
     main()
@@ -0,0 +1,187 @@
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+from exceptions import HTTPTimeoutError
+from metrics import HEDGED
+
+# Соединений в пуле не больше, чем потоков, которые делают запросы.
+POOL_SIZE = 16
+# Дублирующий запрос отправляется, когда первый дольше p95 задержек
+# из последних LATENCY_WINDOW ответов; до HEDGE_MIN_SAMPLES ответов
+# порог не считается и запросы не дублируются.
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_QUANTILE = 0.95
+
+
+def create_session(pool_size=POOL_SIZE):
+    """HTTP-сессия с пулом keep-alive соединений.
+
+    Соединения к API переиспользуются между циклами опроса и подписками,
+    поэтому TCP- и TLS-рукопожатие выполняется один раз на соединение,
+    а не на каждый запрос.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_size,
+        pool_block=True
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+class Deadline:
+    """Бюджет времени на цикл опроса, включая повторные запросы."""
+
+    __slots__ = ('expires',)
+
+    def __init__(self, budget):
+        self.expires = time.monotonic() + budget
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def timeout(self, connect, read):
+        """Таймауты (connect, read) для запроса в пределах бюджета."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise HTTPTimeoutError('Бюджет времени цикла опроса исчерпан.')
+        return min(connect, remaining), min(read, remaining)
+
+
+class HedgedSession:
+    """Обёртка над сессией с дублированием медленных GET-запросов.
+
+    Если ответа нет дольше p95 последних задержек, отправляется второй
+    такой же запрос, и используется ответ, пришедший первым. Запросы
+    выполняются в собственном пуле потоков, поэтому пул соединений
+    сессии должен вмещать и дублирующие запросы.
+    """
+
+    def __init__(self, session, max_workers=POOL_SIZE,
+                 window=LATENCY_WINDOW, min_samples=HEDGE_MIN_SAMPLES,
+                 quantile=HEDGE_QUANTILE):
+        self.session = session
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers * 2,
+            thread_name_prefix='hedge'
+        )
+        self.latencies = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.lock = threading.Lock()
+
+    def threshold(self):
+        """Порог задержки для дублирующего запроса или None."""
+        with self.lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            latencies = sorted(self.latencies)
+        return latencies[int(len(latencies) * self.quantile)]
+
+    def timed_get(self, url, **kwargs):
+        started = time.monotonic()
+        response = self.session.get(url, **kwargs)
+        with self.lock:
+            self.latencies.append(time.monotonic() - started)
+        return response
+
+    def get(self, url, **kwargs):
+        """GET с дублированием; ошибка — только если упали оба запроса."""
+        threshold = self.threshold()
+        if threshold is None:
+            return self.timed_get(url, **kwargs)
+
+        primary = self.executor.submit(self.timed_get, url, **kwargs)
+        done, _ = wait((primary,), timeout=threshold)
+        if done:
+            return primary.result()
+
+        hedge = self.executor.submit(self.timed_get, url, **kwargs)
+        for future in as_completed((primary, hedge)):
+            if future.exception() is None:
+                loser = hedge if future is primary else primary
+                loser.add_done_callback(close_response)
+                HEDGED.inc('primary' if future is primary else 'hedge')
+                return future.result()
+        # Оба запроса завершились ошибкой: отдаём ошибку основного.
+        HEDGED.inc('none')
+        return primary.result()
+
+    def head(self, url, **kwargs):
+        return self.session.head(url, **kwargs)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+def close_response(future):
+    """Освобождение соединения проигравшего дублирующего запроса."""
+    if future.exception() is None:
+        future.result().close()
+
+
+def warm_up(session, url):
+    """Установка соединения с сервером до первого запроса к API."""
+    import requests
+
+    try:
+        session.head(url, allow_redirects=False)
+    except requests.RequestException:
+        return False
+    return True
+
+
+class ResponseCache:
+    """Валидаторы последнего ответа API для условных запросов."""
+
+    __slots__ = ('etag', 'last_modified', 'digest')
+
+    def __init__(self):
+        self.etag = None
+        self.last_modified = None
+        self.digest = None
+
+    def conditional_headers(self):
+        """Заголовки If-None-Match/If-Modified-Since для запроса."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def not_modified(self, response, check_body=True):
+        """Проверка, что ответ совпадает с предыдущим.
+
+        Ответ 304 или тело с тем же хэшем означают, что разбирать его
+        заново не нужно. Для нового ответа запоминаются его валидаторы.
+        Без check_body тело не читается, чтобы его можно было разбирать
+        потоком.
+        """
+        if response.status_code == 304:
+            return True
+        if response.status_code != 200:
+            return False
+
+        if check_body:
+            digest = hashlib.blake2b(
+                response.content, digest_size=16
+            ).digest()
+            if digest == self.digest:
+                return True
+            self.digest = digest
+
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        return False
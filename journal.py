@@ -0,0 +1,108 @@
+import gzip
+import json
+import threading
+import time
+
+from tenants import token_digest
+
+
+def open_text(path, mode):
+    """Открытие журнала; файлы *.gz читаются и пишутся сжатыми."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8', buffering=1)
+
+
+class Journal:
+    """Журнал ответов API и отправок в Telegram для воспроизведения.
+
+    Каждая запись — строка JSON, файл только дописывается. Несжатый
+    журнал сбрасывается на диск построчно, сжатый (*.gz) — при close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open_text(path, 'a')
+        self.lock = threading.Lock()
+        self.records = 0
+
+    def write(self, kind, **fields):
+        """Дозапись одной записи вида kind ('api' или 'send')."""
+        line = json.dumps(
+            {'t': round(time.time(), 3), 'kind': kind, **fields},
+            ensure_ascii=False, separators=(',', ':')
+        )
+        with self.lock:
+            self.file.write(line + '\n')
+            self.records += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_journal(path):
+    """Записи журнала по порядку."""
+    with open_text(path, 'r') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RecordingSession:
+    """Обёртка над HTTP-сессией, которая пишет ответы API в журнал.
+
+    Тело ответа читается целиком, поэтому при записи потоковый разбор
+    ответа не экономит память.
+    """
+
+    def __init__(self, session, journal):
+        self.session = session
+        self.journal = journal
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        response = self.session.get(
+            url, headers=headers, params=params, **kwargs
+        )
+        token = (headers or {}).get('Authorization', '').split(' ')[-1]
+        self.journal.write(
+            'api',
+            tenant=token_digest(token),
+            params=params,
+            status=response.status_code,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            body=response.content.decode('utf-8', 'replace'),
+        )
+        return response
+
+    def head(self, url, **kwargs):
+        return self.session.head(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class RecordingBot:
+    """Обёртка над ботом, которая пишет отправки в Telegram в журнал."""
+
+    def __init__(self, bot, journal):
+        self.bot = bot
+        self.journal = journal
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        try:
+            result = self.bot.send_message(
+                chat_id=chat_id, text=text, **kwargs
+            )
+        except Exception as error:
+            self.journal.write(
+                'send', chat_id=chat_id, text=text,
+                error=type(error).__name__
+            )
+            raise
+        self.journal.write('send', chat_id=chat_id, text=text)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.bot, name)
@@ -0,0 +1,143 @@
+import codecs
+import json
+
+from exceptions import (HTTPConnectionError, HTTPTimeoutError,
+                        JSONContentError, JSONConvertError)
+from schema import validate_homeworks
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+
+decoder = json.JSONDecoder()
+
+
+class HomeworkStream:
+    """Потоковый разбор ответа API по частям.
+
+    Итерация выдаёт домашки из массива homeworks по мере получения
+    данных, в памяти держится только текущая запись и один блок ответа.
+    Остальные ключи верхнего уровня (current_date) попадают в fields
+    и доступны после окончания итерации. close() вызывает on_close —
+    например, возвращает соединение ответа в пул.
+    """
+
+    def __init__(self, chunks, on_close=None):
+        self.chunks = iter(chunks)
+        self.on_close = on_close
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+        self.fields = {}
+
+    def __iter__(self):
+        self.expect('{')
+        if self.skip_to_next() == '}':
+            self.missing_homeworks()
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            if key == 'homeworks':
+                yield from self.homeworks()
+            else:
+                self.fields[key] = self.value()
+            if self.expect(',}') == '}':
+                break
+        self.missing_homeworks()
+
+    def close(self):
+        """Освобождение ответа, из которого читается поток."""
+        if self.on_close is not None:
+            self.on_close()
+
+    def homeworks(self):
+        """Разбор массива homeworks по одной записи."""
+        self.fields['homeworks'] = None
+        if self.skip_to_next() != '[':
+            raise JSONContentError('В ответе от API нет списка домашек.')
+        self.position += 1
+        if self.skip_to_next() == ']':
+            self.position += 1
+            return
+        while True:
+            homework = self.value()
+            validate_homeworks((homework,))
+            yield homework
+            if self.expect(',]') == ']':
+                return
+
+    def missing_homeworks(self):
+        if 'homeworks' not in self.fields:
+            raise JSONContentError('В ответе от API нет списка домашек.')
+        del self.fields['homeworks']
+
+    def read(self):
+        """Дочитывание следующего блока; False, если ответ закончился.
+
+        Обрыв соединения и таймаут чтения посреди ответа становятся
+        теми же ошибками, что и при отправке запроса.
+        """
+        import requests
+
+        if self.exhausted:
+            return False
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+        try:
+            for chunk in self.chunks:
+                text = self.text_decoder.decode(chunk)
+                if text:
+                    self.buffer += text
+                    return True
+        except requests.Timeout:
+            raise HTTPTimeoutError('Превышено время ожидания ответа от API.')
+        except requests.RequestException:
+            raise HTTPConnectionError('Ответ от API получен не полностью.')
+        self.buffer += self.text_decoder.decode(b'', final=True)
+        self.exhausted = True
+        return True
+
+    def skip_to_next(self):
+        """Пропуск пробелов; возвращает следующий символ."""
+        while True:
+            length = len(self.buffer)
+            while (self.position < length
+                   and self.buffer[self.position] in WHITESPACE):
+                self.position += 1
+            if self.position < length:
+                return self.buffer[self.position]
+            if not self.read():
+                raise JSONConvertError(
+                    'Не удалось преобразовать ответ от API в JSON.'
+                )
+
+    def expect(self, allowed):
+        """Чтение одного из ожидаемых символов-разделителей."""
+        char = self.skip_to_next()
+        if char not in allowed:
+            raise JSONConvertError(
+                'Не удалось преобразовать ответ от API в JSON.'
+            )
+        self.position += 1
+        return char
+
+    def value(self):
+        """Разбор очередного JSON-значения, дочитывая данные по мере нужды.
+
+        Значение в самом конце буфера принимается только после окончания
+        ответа: иначе число могло оказаться разрезано между блоками.
+        """
+        self.skip_to_next()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.position)
+            except json.decoder.JSONDecodeError:
+                if self.read():
+                    continue
+                raise JSONConvertError(
+                    'Не удалось преобразовать ответ от API в JSON.'
+                )
+            if end < len(self.buffer) or not self.read():
+                self.position = end
+                return value
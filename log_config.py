@@ -0,0 +1,182 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+import time
+from logging import StreamHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = 'homework_bot.log'
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+QUEUE_SIZE = 10_000
+# Одинаковые записи ниже WARNING пишутся не чаще SAMPLE_BURST раз
+# за SAMPLE_PERIOD секунд, ошибки и предупреждения пишутся все.
+SAMPLE_PERIOD = 60
+SAMPLE_BURST = 1
+SAMPLE_KEYS = 1000
+
+formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+
+# Подписка и номер цикла опроса, к которым относятся записи лога.
+log_context = contextvars.ContextVar('log_context', default=(None, None))
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON с полями подписки и цикла."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        for field in ('tenant', 'cycle', 'error_type', 'suppressed'):
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class ContextFilter(logging.Filter):
+    """Добавление в запись подписки и цикла из log_context."""
+
+    def filter(self, record):
+        record.tenant, record.cycle = log_context.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Ограничение частоты повторяющихся записей ниже level.
+
+    Записи различаются по шаблону сообщения (record.msg), поэтому
+    аргументы в лог передаются через %, а не f-строкой. Сколько
+    записей пропущено, видно в поле suppressed следующей записи.
+    """
+
+    def __init__(self, period=SAMPLE_PERIOD, burst=SAMPLE_BURST,
+                 level=logging.WARNING, max_keys=SAMPLE_KEYS):
+        super().__init__()
+        self.period = period
+        self.burst = burst
+        self.level = level
+        self.max_keys = max_keys
+        self.windows = {}
+        self.suppressed = 0
+
+    def filter(self, record):
+        if record.levelno >= self.level:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        window = self.windows.get(key)
+        if window is None or now - window[0] >= self.period:
+            if len(self.windows) >= self.max_keys:
+                self.windows.clear()
+            window = self.windows[key] = [now, 0, 0]
+        if window[1] < self.burst:
+            window[1] += 1
+            if window[2]:
+                record.suppressed, window[2] = window[2], 0
+            return True
+        window[2] += 1
+        self.suppressed += 1
+        return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Постановка записей лога в ограниченную очередь без ожидания.
+
+    При переполнении очереди записи ниже ERROR отбрасываются, а ошибки
+    вытесняют самую старую запись. Число потерянных записей — в dropped.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Очередь в том же процессе: сообщение форматируется лениво,
+        # уже в потоке обработчиков, а не в коде, который пишет в лог.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            self.dropped += 1
+        if record.levelno < logging.ERROR:
+            return
+        try:
+            self.queue.get_nowait()
+            self.queue.put_nowait(record)
+        except (queue.Empty, queue.Full):
+            pass
+
+
+class LogPipeline:
+    """Логгер пишет только в очередь, обработчики работают в своём потоке.
+
+    Медленные обработчики (файл, stdout, отправка в Telegram) не
+    задерживают код, который пишет в лог.
+    """
+
+    def __init__(self, logger, *handlers, maxsize=QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.handler.addFilter(ContextFilter())
+        self.listener = QueueListener(
+            self.queue, *handlers, respect_handler_level=True
+        )
+        logger.addHandler(self.handler)
+        self.running = False
+
+    @property
+    def dropped(self):
+        """Сколько записей отброшено из-за переполнения очереди."""
+        return self.handler.dropped
+
+    def start(self):
+        """Запуск потока-обработчика очереди."""
+        self.listener.start()
+        self.running = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Обработка оставшихся записей и остановка потока."""
+        if self.running:
+            self.listener.stop()
+            self.running = False
+
+    def add_handler(self, handler, level=logging.DEBUG,
+                    handler_formatter=formatter):
+        """Подключение ещё одного обработчика к работающей очереди."""
+        handler.setLevel(level)
+        handler.setFormatter(handler_formatter)
+        self.listener.handlers = self.listener.handlers + (handler,)
+
+
+def setup_logging(pipeline, path=None):
+    """Подключение файла с ротацией и stdout к очереди и запуск обработки.
+
+    Файл по умолчанию — LOG_FILE из окружения или homework_bot.log. В него
+    пишутся строки JSON, повторяющиеся записи ниже WARNING прореживаются
+    SamplingFilter.
+    """
+    path = path or os.getenv('LOG_FILE', LOG_FILE)
+    pipeline.handler.addFilter(SamplingFilter())
+    pipeline.add_handler(
+        RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+            encoding='utf-8'
+        ),
+        handler_formatter=JsonFormatter()
+    )
+    pipeline.add_handler(StreamHandler(sys.stdout))
+    pipeline.start()
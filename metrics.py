@@ -0,0 +1,201 @@
+import bisect
+import threading
+import time
+
+import exceptions
+
+# Границы корзин гистограмм задержек в секундах.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Counter:
+    """Счётчик с метками в формате Prometheus."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = (
+                self.values.get(label_values, 0) + amount
+            )
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+        for label_values, value in values.items():
+            yield self.name, self.label_pairs(label_values), value
+
+    def label_pairs(self, label_values, extra=()):
+        pairs = list(zip(self.labels, label_values)) + list(extra)
+        return ','.join(f'{key}="{value}"' for key, value in pairs)
+
+
+class Histogram(Counter):
+    """Гистограмма с накопительными корзинами, суммой и количеством."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(label_values)
+            if state is None:
+                state = self.values[label_values] = [
+                    [0] * (len(self.buckets) + 1), 0.0
+                ]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, *label_values):
+        """Контекстный менеджер для замера длительности блока кода."""
+        return Timer(self, label_values)
+
+    def samples(self):
+        with self.lock:
+            values = {
+                key: (list(counts), total)
+                for key, (counts, total) in self.values.items()
+            }
+        for label_values, (counts, total) in values.items():
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield (self.name + '_bucket',
+                       self.label_pairs(label_values, [('le', bound)]),
+                       cumulative)
+            labels = self.label_pairs(label_values)
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, cumulative
+
+
+class Timer:
+
+    __slots__ = ('histogram', 'label_values', 'started')
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(
+            time.perf_counter() - self.started, *self.label_values
+        )
+
+
+class Registry:
+    """Набор метрик и их вывод в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                labels = f'{{{labels}}}' if labels else ''
+                lines.append(f'{name}{labels} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+API_LATENCY = registry.register(Histogram(
+    'practicum_request_seconds', 'Длительность запроса к API Практикума.'
+))
+API_RESPONSES = registry.register(Counter(
+    'practicum_responses_total', 'Ответы API Практикума по HTTP-статусу.',
+    ('status',)
+))
+HEDGED = registry.register(Counter(
+    'practicum_hedged_requests_total',
+    'Дублирующие запросы к API после порога p95: какой из запросов '
+    'ответил первым (none — оба с ошибкой).',
+    ('winner',)
+))
+COALESCED = registry.register(Counter(
+    'practicum_coalesced_requests_total',
+    'Запросы подписок с общим токеном: hit — ответ получен без обращения '
+    'к API, miss — выполнен запрос.',
+    ('result',)
+))
+JSON_DECODE = registry.register(Histogram(
+    'practicum_json_decode_seconds', 'Время разбора JSON ответа API.',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+))
+TELEGRAM_LATENCY = registry.register(Histogram(
+    'telegram_send_seconds', 'Длительность отправки сообщения в Telegram.'
+))
+TELEGRAM_FAILURES = registry.register(Counter(
+    'telegram_send_failures_total', 'Неудачные отправки в Telegram.',
+    ('reason',)
+))
+CYCLE_DURATION = registry.register(Histogram(
+    'poll_cycle_seconds', 'Длительность одного цикла опроса подписки.'
+))
+SLEEP_DRIFT = registry.register(Histogram(
+    'poll_sleep_drift_seconds',
+    'Насколько ожидание между опросами оказалось дольше запланированного.',
+    buckets=(0.001, 0.01, 0.1, 0.5, 1, 5, 10, 60)
+))
+ERRORS = registry.register(Counter(
+    'bot_errors_total', 'Ошибки по классам исключений.', ('exception',)
+))
+# Счётчики для всех классов из exceptions.py видны сразу, даже нулевые.
+for name, value in vars(exceptions).items():
+    if isinstance(value, type) and issubclass(value, Exception):
+        ERRORS.inc(name, amount=0)
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Отдача метрик на http://host:port/metrics из фонового потока.
+
+    Метрики форматируются только при запросе, без запросов сервер
+    ничего не делает.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    )
+    thread.start()
+    return server
@@ -0,0 +1,287 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from homework import logger
+from metrics import TELEGRAM_FAILURES, TELEGRAM_LATENCY
+
+# Ограничения Telegram Bot API: около 30 сообщений в секунду всего
+# и не больше одного сообщения в секунду в один чат.
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+QUEUE_SIZE = 1000
+SENDERS = 4
+MAX_ATTEMPTS = 5
+SPILL_FILE = 'outbox.spill'
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, запас capacity."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """Резервирование токена; возвращает, сколько секунд подождать."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0
+        return -self.tokens / self.rate
+
+
+class Outbox:
+    """Очередь исходящих сообщений Telegram с фоновой отправкой.
+
+    put() не ждёт Telegram: сообщение ставится в очередь своего чата,
+    а при переполнении общего лимита maxsize дописывается в файл
+    spill_path и возвращается, когда место освободится.
+
+    Отправители берут из очереди ready чаты, которым лимит уже позволяет
+    отправку, и отправляют по одному сообщению. Чат попадает в ready
+    снова, только когда его сообщение отправлено и подошёл срок по его
+    лимиту: сообщения чата уходят по порядку, а поток сообщений в один
+    чат не занимает отправителей, пока ждёт своей очереди.
+    """
+
+    def __init__(self, bot, executor, maxsize=QUEUE_SIZE,
+                 spill_path=SPILL_FILE, global_rate=GLOBAL_RATE,
+                 chat_rate=CHAT_RATE, senders=SENDERS):
+        self.bot = bot
+        self.executor = executor
+        self.maxsize = maxsize
+        self.size = 0
+        self.chats = {}
+        self.ready = asyncio.Queue()
+        self.delayed = {}
+        self.empty = asyncio.Event()
+        self.empty.set()
+        self.spill_path = spill_path
+        self.spilled = 0
+        self.senders = senders
+        self.bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_buckets = {}
+        self.sent = 0
+        self.failed = 0
+        self.tasks = []
+
+    def put(self, chat_id, text):
+        """Постановка сообщения в очередь без ожидания отправки.
+
+        Пока на диске есть отложенные сообщения, новые дописываются за
+        ними: иначе чат получил бы их раньше более старых.
+        """
+        if self.spilled or self.size >= self.maxsize:
+            self.spill([(chat_id, text)])
+            return
+        self.size += 1
+        self.empty.clear()
+        messages = self.chats.get(chat_id)
+        if messages is None:
+            self.chats[chat_id] = deque([(text, 1)])
+            self.schedule(chat_id)
+        else:
+            # Чат уже ждёт в ready или отправляет: после отправки
+            # он встанет в очередь снова.
+            messages.append((text, 1))
+
+    def schedule(self, chat_id, delay=0):
+        """Постановка чата в ready, когда позволит его лимит."""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        delay = max(delay, bucket.reserve())
+        if delay > 0:
+            self.delayed[chat_id] = asyncio.get_running_loop().call_later(
+                delay, self.make_ready, chat_id
+            )
+        else:
+            self.ready.put_nowait(chat_id)
+
+    def make_ready(self, chat_id):
+        self.delayed.pop(chat_id, None)
+        self.ready.put_nowait(chat_id)
+
+    def spill(self, items, front=False):
+        """Дозапись сообщений, не поместившихся в очередь, на диск.
+
+        С front сообщения записываются перед уже отложенными: они старше.
+        """
+        lines = [json.dumps(item, ensure_ascii=False) + '\n' for item in items]
+        mode = 'a'
+        if front and os.path.exists(self.spill_path):
+            with open(self.spill_path, encoding='utf-8') as file:
+                lines.extend(file)
+            mode = 'w'
+        with open(self.spill_path, mode, encoding='utf-8') as file:
+            file.writelines(lines)
+        self.spilled += len(items)
+        logger.warning('Сообщений отложено на диск: %d.', self.spilled)
+
+    def unspill(self):
+        """Возврат сообщений с диска в очередь, пока в ней есть место."""
+        if not os.path.exists(self.spill_path):
+            self.spilled = 0
+            return
+        with open(self.spill_path, encoding='utf-8') as file:
+            items = [tuple(json.loads(line)) for line in file if line.strip()]
+        os.remove(self.spill_path)
+        self.spilled = 0
+
+        free = self.maxsize - self.size
+        for chat_id, text in items[:free]:
+            self.put(chat_id, text)
+        if items[free:]:
+            self.spill(items[free:])
+
+    async def run(self):
+        """Фоновая отправка сообщений из очереди."""
+        self.unspill()
+        self.tasks = [
+            asyncio.ensure_future(self.sender()) for _ in range(self.senders)
+        ]
+        await asyncio.gather(*self.tasks)
+
+    async def flush(self):
+        """Отправка всего, что сейчас есть в очереди и на диске."""
+        self.unspill()
+        while self.size:
+            await self.send_next(await self.ready.get())
+
+    async def drain(self, timeout):
+        """Досылка очереди при остановке.
+
+        Отправители работают ещё timeout секунд и останавливаются, затем
+        недосланное сохраняется на диск по порядку сообщений каждого чата
+        и перед отложенными на диск раньше.
+        """
+        try:
+            await asyncio.wait_for(self.empty.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        for handle in self.delayed.values():
+            handle.cancel()
+        self.delayed = {}
+        items = [
+            (chat_id, text)
+            for chat_id, messages in self.chats.items()
+            for text, _ in messages
+        ]
+        self.chats = {}
+        self.size = 0
+        self.empty.set()
+        if items:
+            self.spill(items, front=True)
+
+    async def sender(self):
+        """Обработчик очереди: отправка по одному сообщению."""
+        while True:
+            await self.send_next(await self.ready.get())
+
+    async def send_next(self, chat_id):
+        """Отправка очередного сообщения чата и новая постановка чата.
+
+        При сбое сообщение остаётся первым в очереди чата, и чат
+        встаёт в ready после задержки; отправитель тем временем
+        занимается другими чатами.
+        """
+        messages = self.chats[chat_id]
+        text, attempt = messages.popleft()
+        try:
+            await self.throttle()
+            delay = await self.try_send(chat_id, text, attempt)
+        except asyncio.CancelledError:
+            # Остановка посреди отправки: drain() сохранит сообщение,
+            # оно уйдёт после перезапуска, в худшем случае повторно.
+            messages.appendleft((text, attempt))
+            raise
+        if delay is not None and attempt < MAX_ATTEMPTS:
+            messages.appendleft((text, attempt + 1))
+        else:
+            if delay is not None:
+                self.failed += 1
+                logger.error(
+                    'Боту не удалось отправить сообщение в Telegram '
+                    'за %d попыток.', MAX_ATTEMPTS
+                )
+            self.size -= 1
+        if messages:
+            self.schedule(chat_id, delay or 0)
+        else:
+            del self.chats[chat_id]
+        if not self.size:
+            self.empty.set()
+        if self.spilled and self.size <= self.maxsize // 2:
+            self.unspill()
+
+    async def throttle(self):
+        """Ожидание свободного токена в общем лимите."""
+        delay = self.bucket.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def try_send(self, chat_id, text, attempt):
+        """Одна попытка отправки.
+
+        Возвращает None, если повторять не нужно, иначе задержку перед
+        следующей попыткой: RetryAfter от Telegram или экспоненциальную
+        при сетевых сбоях.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            with TELEGRAM_LATENCY.time():
+                await loop.run_in_executor(
+                    self.executor, send, self.bot, chat_id, text
+                )
+        except RetryAfter as error:
+            TELEGRAM_FAILURES.inc('retry_after')
+            logger.warning(
+                'Telegram ограничил частоту отправки на %s с.',
+                error.retry_after
+            )
+            return error.retry_after
+        except BadRequest as error:
+            # BadRequest наследует NetworkError, но повтор тут не поможет.
+            self.fail(error)
+            return None
+        except NetworkError as error:
+            TELEGRAM_FAILURES.inc('network')
+            logger.warning('Сбой сети при отправке в Telegram. %s', error)
+            return 2 ** attempt
+        except Exception as error:
+            self.fail(error)
+            return None
+        self.sent += 1
+        logger.info('Бот успешно отправил сообщение в Telegram.')
+        return None
+
+    def fail(self, error):
+        """Учёт сообщения, которое отправить не удалось."""
+        self.failed += 1
+        TELEGRAM_FAILURES.inc(type(error).__name__)
+        logger.error(
+            'Боту не удалось отправить сообщение в Telegram. %s', error
+        )
+
+
+def send(bot, chat_id, text):
+    """Блокирующая отправка сообщения, выполняется в пуле потоков."""
+    bot.send_message(chat_id=chat_id, text=text)
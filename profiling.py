@@ -0,0 +1,136 @@
+import cProfile
+import functools
+import json
+import pstats
+import threading
+import time
+
+import homework
+import outbox
+from homework import logger
+
+PROFILE_CYCLES = 100
+
+# Этап → функции, время которых он учитывает. Опрос идёт через
+# request_api_answer или stream_api_answer (get_api_answer — обёртка над
+# первой), отправка — через outbox.send.
+STAGES = {
+    'get_api_answer': ((homework, 'request_api_answer'),
+                       (homework, 'stream_api_answer')),
+    'check_response': ((homework, 'check_response'),),
+    'parse_status': ((homework, 'parse_status'),),
+    'send_message': ((outbox, 'send'),),
+}
+
+
+class Profiler:
+    """Профиль первых cycles циклов опроса и время этапов.
+
+    cProfile работает в потоке, где его включили, поэтому каждый цикл
+    профилируется отдельно в потоке пула, а результаты складываются.
+    Под профилем одновременно идёт только один цикл: с Python 3.12 два
+    включённых профиля в разных потоках конфликтуют в sys.monitoring,
+    поэтому циклы, начатые во время профилируемого, идут без профиля.
+    Время этапов (настенное и процессорное) считается обёртками, которые
+    start() ставит на место функций модулей, а close() убирает; без
+    профилировщика обёрток нет и накладных расходов тоже.
+    """
+
+    def __init__(self, path, cycles=PROFILE_CYCLES):
+        self.path = path
+        self.cycles = cycles
+        self.profiled = 0
+        self.stats = None
+        self.stages = {name: [0, 0.0, 0.0] for name in STAGES}
+        self.originals = []
+        self.lock = threading.Lock()
+        self.profiling = threading.Lock()
+
+    def start(self):
+        """Подмена функций этапов обёртками с замером времени."""
+        for name, targets in STAGES.items():
+            for module, attr in targets:
+                func = getattr(module, attr)
+                self.originals.append((module, attr, func))
+                setattr(module, attr, self.timed(name, func))
+
+    def timed(self, name, func):
+        totals = self.stages[name]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            wall = time.perf_counter()
+            cpu = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                cpu = time.thread_time() - cpu
+                wall = time.perf_counter() - wall
+                with self.lock:
+                    totals[0] += 1
+                    totals[1] += wall
+                    totals[2] += cpu
+        return wrapper
+
+    def run(self, func, *args):
+        """Вызов func; пока не набрано cycles циклов — под cProfile.
+
+        Если другой цикл уже профилируется, func вызывается без профиля
+        и в cycles не засчитывается.
+        """
+        if (self.profiled >= self.cycles
+                or not self.profiling.acquire(blocking=False)):
+            return func(*args)
+        try:
+            # Счётчик меняется только под self.profiling, но повторная
+            # проверка нужна: другой цикл мог набрать cycles до захвата.
+            if self.profiled >= self.cycles:
+                return func(*args)
+            with self.lock:
+                self.profiled += 1
+            # func вызывается без self.lock: обёртки этапов берут её сами.
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args)
+            finally:
+                with self.lock:
+                    if self.stats is None:
+                        self.stats = pstats.Stats(profile)
+                    else:
+                        self.stats.add(profile)
+        finally:
+            self.profiling.release()
+
+    def report(self):
+        """Время этапов: вызовы, суммарное и среднее время в секундах."""
+        with self.lock:
+            return {
+                name: {
+                    'calls': calls,
+                    'wall': round(wall, 6),
+                    'cpu': round(cpu, 6),
+                    'wall_avg': round(wall / calls, 6) if calls else None,
+                }
+                for name, (calls, wall, cpu) in self.stages.items()
+            }
+
+    def dump(self):
+        """Запись профиля в path и времени этапов в path.stages.json."""
+        with self.lock:
+            if self.stats is not None:
+                self.stats.dump_stats(self.path)
+        with open(f'{self.path}.stages.json', 'w', encoding='utf-8') as file:
+            json.dump(
+                {'cycles': self.profiled, 'stages': self.report()},
+                file, ensure_ascii=False, indent=2
+            )
+        logger.info(
+            'Профиль %d циклов записан в %s.', self.profiled, self.path
+        )
+
+    def close(self):
+        """Запись результатов и возврат исходных функций этапов."""
+        self.dump()
+        for module, attr, func in reversed(self.originals):
+            setattr(module, attr, func)
+        self.originals = []
@@ -0,0 +1,116 @@
+import random
+import time
+
+from exceptions import CircuitOpenError, HTTPConnectionError, JSONConvertError
+from tenants import token_digest
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# Ошибки, после которых запрос повторяется с экспоненциальной задержкой.
+BACKOFF_ERRORS = (HTTPConnectionError, JSONConvertError)
+# Постоянный для токена разброс интервала опроса, до ±SPREAD.
+SPREAD = 0.05
+
+
+def phase(token):
+    """Постоянная для токена доля интервала в [0, 1).
+
+    Первый опрос подписки сдвигается на эту долю интервала: опросы
+    распределяются равномерно, а подписки с общим токеном совпадают.
+    """
+    return int(token_digest(token), 16) / 16 ** 16
+
+
+def spread(token, ratio=SPREAD):
+    """Постоянный для токена множитель интервала опроса.
+
+    Подписки, чьи опросы совпали (например, после сбоя API), с каждым
+    циклом расходятся, а не опрашивают API одной волной.
+    """
+    return 1 + ratio * (2 * phase(token) - 1)
+
+
+class FixedPolicy:
+    """Политика опроса с постоянным интервалом."""
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def next_interval(self, tenant, error=None):
+        """Интервал до следующего запроса подписки в секундах."""
+        return self.interval
+
+
+class AdaptivePolicy:
+    """Интервал опроса по последнему статусу домашки.
+
+    Пока работа на проверке, опрос частый; если статус давно не менялся —
+    редкий; после сетевых ошибок и ошибок JSON задержка растёт
+    экспоненциально со случайным разбросом, а при разомкнутом
+    предохранителе опрос ждёт пробного запроса.
+    """
+
+    def __init__(self, default=10 * MINUTE, reviewing=2 * MINUTE,
+                 idle=30 * MINUTE, idle_after=3 * DAY, backoff_base=30,
+                 backoff_max=30 * MINUTE, jitter=0.5):
+        self.default = default
+        self.reviewing = reviewing
+        self.idle = idle
+        self.idle_after = idle_after
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+
+    def next_interval(self, tenant, error=None):
+        """Интервал до следующего запроса подписки в секундах."""
+        if isinstance(error, CircuitOpenError):
+            # Подписки просыпаются вразброс после пробного запроса.
+            return error.retry_after * random.uniform(1, 1 + self.jitter)
+        if isinstance(error, BACKOFF_ERRORS):
+            delay = min(
+                self.backoff_max,
+                self.backoff_base * 2 ** (tenant.failures - 1)
+            )
+            return delay * random.uniform(1 - self.jitter, 1)
+        if tenant.status == 'reviewing':
+            return self.reviewing
+        if (tenant.changed_at is not None
+                and time.time() - tenant.changed_at > self.idle_after):
+            return self.idle
+        return self.default
+
+
+class Scheduler:
+    """Выбор интервалов по политике и учёт сэкономленных запросов."""
+
+    def __init__(self, policy, baseline):
+        self.policy = policy
+        self.baseline = baseline
+        self.requests = 0
+        self.scheduled = 0
+
+    def next_delay(self, tenant, error=None):
+        """Интервал до следующего запроса с учётом результата текущего."""
+        if isinstance(error, BACKOFF_ERRORS):
+            tenant.failures += 1
+        else:
+            tenant.failures = 0
+        delay = self.policy.next_interval(tenant, error)
+        self.requests += 1
+        self.scheduled += delay
+        return delay
+
+    @property
+    def saved(self):
+        """Сколько запросов сэкономлено относительно опроса с baseline."""
+        return self.scheduled / self.baseline - self.requests
+
+    def report(self):
+        """Строка со статистикой для лога."""
+        return (
+            f'Запросов к API: {self.requests}, при фиксированном интервале '
+            f'было бы {self.scheduled / self.baseline:.0f}, '
+            f'сэкономлено: {self.saved:.0f}.'
+        )
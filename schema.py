@@ -0,0 +1,37 @@
+from exceptions import JSONContentError
+
+# Поля домашки, которыми пользуется бот, и их типы. Отсутствие поля
+# здесь не ошибка: нехватку имени или статуса обрабатывает parse_status.
+HOMEWORK_SCHEMA = {
+    'id': int,
+    'homework_name': str,
+    'status': str,
+}
+
+
+def compile_validator(schema):
+    """Функция проверки записей по схеме {поле: тип}.
+
+    Схема разворачивается в кортеж один раз, при создании функции;
+    каждая запись проверяется за один проход без логирования.
+    """
+    fields = tuple(schema.items())
+
+    def validate(records):
+        for record in records:
+            if type(record) is not dict:
+                raise JSONContentError(
+                    'Содержимое списка домашек некорректно.'
+                )
+            for field, expected in fields:
+                value = record.get(field)
+                if value is not None and type(value) is not expected:
+                    raise JSONContentError(
+                        f'Поле {field} домашки имеет некорректный тип.'
+                    )
+        return records
+
+    return validate
+
+
+validate_homeworks = compile_validator(HOMEWORK_SCHEMA)
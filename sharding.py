@@ -0,0 +1,179 @@
+import bisect
+import hashlib
+import sqlite3
+import time
+
+from tenants import token_digest
+
+# Аренда подписки действует LEASE_TTL секунд и продлевается каждую треть
+# этого срока. Воркер перестаёт опрашивать подписку, если не смог продлить
+# аренду, раньше, чем её сможет забрать другой воркер.
+LEASE_TTL = 30
+REPLICAS = 64
+BUSY_TIMEOUT = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    tenant TEXT PRIMARY KEY,
+    worker TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+def hash_point(value):
+    """Точка на кольце для строки."""
+    return int(hashlib.sha1(value.encode()).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Консистентное хэширование с виртуальными узлами.
+
+    Когда воркер появляется или пропадает, к другим воркерам переходят
+    только его подписки, остальные остаются на месте.
+    """
+
+    def __init__(self, nodes, replicas=REPLICAS):
+        self.ring = sorted(
+            (hash_point(f'{node}#{replica}'), node)
+            for node in nodes for replica in range(replicas)
+        )
+        self.points = [point for point, _ in self.ring]
+
+    def owner(self, key):
+        """Воркер, которому принадлежит ключ, или None без воркеров."""
+        if not self.ring:
+            return None
+        index = bisect.bisect(self.points, hash_point(key))
+        return self.ring[index % len(self.ring)][1]
+
+
+class LeaseStore:
+    """Пульс воркеров и аренда подписок в общей базе SQLite.
+
+    Время в базе — time.time(), поэтому часы хостов, которые делят
+    один файл, должны быть синхронизированы.
+    """
+
+    def __init__(self, path, worker, ttl=LEASE_TTL):
+        self.worker = worker
+        self.ttl = ttl
+        self.connection = sqlite3.connect(
+            path, timeout=BUSY_TIMEOUT, isolation_level=None,
+            check_same_thread=False
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def heartbeat(self, now):
+        """Отметка о том, что воркер жив; список живых воркеров."""
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO workers VALUES (?, ?)',
+                (self.worker, now)
+            )
+        rows = self.connection.execute(
+            'SELECT worker FROM workers WHERE heartbeat > ?',
+            (now - self.ttl,)
+        ).fetchall()
+        return [worker for worker, in rows]
+
+    def acquire(self, keys, now):
+        """Взятие и продление аренды; ключи, которые теперь у воркера.
+
+        Чужая аренда забирается, только если её срок истёк.
+        """
+        expires = now + self.ttl
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO leases VALUES (?, ?, ?) '
+                'ON CONFLICT(tenant) DO UPDATE SET '
+                'worker = excluded.worker, expires = excluded.expires '
+                'WHERE leases.worker = excluded.worker '
+                'OR leases.expires < ?',
+                ((key, self.worker, expires, now) for key in keys)
+            )
+            rows = connection.execute(
+                'SELECT tenant FROM leases WHERE worker = ? AND expires > ?',
+                (self.worker, now)
+            ).fetchall()
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return {key for key, in rows}
+
+    def release(self, keys):
+        """Отказ от аренды, чтобы подписки сразу забрали другие воркеры."""
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM leases WHERE tenant = ? AND worker = ?',
+                ((key, self.worker) for key in keys)
+            )
+
+    def leave(self):
+        """Уход воркера: его подписки освобождаются, пульс удаляется."""
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM leases WHERE worker = ?', (self.worker,)
+            )
+            self.connection.execute(
+                'DELETE FROM workers WHERE worker = ?', (self.worker,)
+            )
+        self.connection.close()
+
+
+class ShardCoordinator:
+    """Подписки, которые опрашивает этот воркер.
+
+    Подписки делятся между живыми воркерами по кольцу хэшей от токена,
+    поэтому подписки с общим токеном попадают к одному воркеру и их
+    запросы объединяются. Опрашивать и уведомлять можно только подписки
+    с действующей арендой: два воркера не напишут в один чат.
+    """
+
+    def __init__(self, store, ttl=LEASE_TTL):
+        self.store = store
+        self.worker = store.worker
+        self.ttl = ttl
+        self.owned = set()
+        self.valid_until = 0.0
+
+    @property
+    def renew_interval(self):
+        return self.ttl / 3
+
+    def owns(self, key):
+        """Есть ли у воркера действующая аренда подписки."""
+        return key in self.owned and time.monotonic() < self.valid_until
+
+    def rebalance(self, tenants):
+        """Продление аренды и перераспределение подписок.
+
+        Возвращает подписки, которые перешли к воркеру: их состояние
+        нужно перечитать из общей базы.
+        """
+        started = time.monotonic()
+        now = time.time()
+        ring = HashRing(self.store.heartbeat(now))
+        wanted = {
+            tenant.key for tenant in tenants
+            if ring.owner(token_digest(tenant.token)) == self.worker
+        }
+        self.store.release(self.owned - wanted)
+        held = self.store.acquire(wanted, now)
+        gained = held - self.owned
+        self.owned = held
+        # Аренда в базе действует ttl, локально — на треть меньше.
+        self.valid_until = started + self.ttl - self.renew_interval
+        return [tenant for tenant in tenants if tenant.key in gained]
+
+    def close(self):
+        self.owned = set()
+        self.store.leave()
@@ -0,0 +1,149 @@
+import json
+import sqlite3
+import threading
+import time
+
+FLUSH_INTERVAL = 5
+BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursors (
+    tenant TEXT PRIMARY KEY,
+    from_date INTEGER,
+    changed_at REAL
+);
+CREATE TABLE IF NOT EXISTS homeworks (
+    tenant TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    status TEXT,
+    name TEXT,
+    PRIMARY KEY (tenant, homework)
+);
+"""
+# Столбцы, добавленные после первой версии схемы: базы старых версий
+# дополняются ими при открытии.
+COLUMNS = (
+    ('cursors', 'changed_at', 'REAL'),
+    ('homeworks', 'name', 'TEXT'),
+)
+
+
+class StateStore:
+    """Курсоры и последние отправленные статусы подписок в SQLite.
+
+    База работает в режиме WAL с synchronous=NORMAL: изменения копятся
+    в памяти и записываются одной транзакцией раз в FLUSH_INTERVAL секунд
+    или по достижении BATCH_SIZE изменённых подписок, поэтому fsync
+    выполняется не чаще одного раза на пачку.
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL,
+                 batch_size=BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.migrate()
+        self.lock = threading.Lock()
+        self.dirty = {}
+        self.flushed_at = time.monotonic()
+
+    def migrate(self):
+        """Добавление столбцов, которых нет в базе старой версии."""
+        for table, column, kind in COLUMNS:
+            columns = {
+                row[1] for row in
+                self.connection.execute(f'PRAGMA table_info({table})')
+            }
+            if column not in columns:
+                with self.connection:
+                    self.connection.execute(
+                        f'ALTER TABLE {table} ADD COLUMN {column} {kind}'
+                    )
+
+    def load(self, tenants):
+        """Восстановление курсоров, статусов и имён домашек подписок.
+
+        Статус подписки выводится из восстановленных домашек, а время
+        последнего изменения читается из базы.
+        """
+        by_key = {tenant.key: tenant for tenant in tenants}
+        with self.lock:
+            cursors = self.connection.execute(
+                'SELECT tenant, from_date, changed_at FROM cursors'
+            ).fetchall()
+            homeworks = self.connection.execute(
+                'SELECT tenant, homework, status, name FROM homeworks'
+            ).fetchall()
+
+        restored = 0
+        for key, current_date, changed_at in cursors:
+            tenant = by_key.get(key)
+            if tenant is None:
+                continue
+            if changed_at is not None:
+                tenant.changed_at = changed_at
+            if current_date is not None:
+                tenant.current_date = current_date
+                restored += 1
+        for key, homework, status, name in homeworks:
+            tenant = by_key.get(key)
+            if tenant is not None:
+                homework = json.loads(homework)
+                tenant.homeworks[homework] = status
+                if name is not None:
+                    tenant.names[homework] = name
+        for tenant in tenants:
+            tenant.refresh_status()
+        return restored
+
+    def update(self, tenant):
+        """Пометка подписки для записи; True, если пора сбросить пачку."""
+        with self.lock:
+            self.dirty[tenant.key] = tenant
+        return (
+            len(self.dirty) >= self.batch_size
+            or time.monotonic() - self.flushed_at >= self.flush_interval
+        )
+
+    def flush(self, keep=None):
+        """Запись всех изменённых подписок одной транзакцией.
+
+        С keep записываются только подписки, для ключа которых keep
+        возвращает True; остальные изменения отбрасываются.
+        """
+        with self.lock:
+            dirty, self.dirty = self.dirty, {}
+            self.flushed_at = time.monotonic()
+        if keep is not None:
+            dirty = {key: tenant for key, tenant in dirty.items() if keep(key)}
+        if not dirty:
+            return 0
+
+        cursors = [
+            (key, tenant.current_date, tenant.changed_at)
+            for key, tenant in dirty.items()
+        ]
+        homeworks = [
+            (key, json.dumps(homework), status, tenant.names.get(homework))
+            for key, tenant in dirty.items()
+            for homework, status in list(tenant.homeworks.items())
+        ]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?, ?)', cursors
+            )
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO homeworks VALUES (?, ?, ?, ?)',
+                homeworks
+            )
+        return len(dirty)
+
+    def close(self, keep=None):
+        """Сброс оставшихся изменений и закрытие базы."""
+        self.flush(keep)
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import deque
+
+HISTORY_SIZE = 20
+
+
+class ChatStatus:
+    """Последнее известное состояние домашек одного чата."""
+
+    __slots__ = ('homeworks', 'history', 'current_date', 'checked_at')
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self.homeworks = {}
+        self.history = deque(maxlen=history_size)
+        self.current_date = None
+        self.checked_at = None
+
+
+class StatusCache:
+    """Кэш статусов для команд бота, заполняется циклом опроса.
+
+    Команды читают только этот кэш и никогда не обращаются к API,
+    поэтому время ответа не зависит от задержек Практикума.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self.history_size = history_size
+        self.chats = {}
+        self.lock = threading.Lock()
+
+    def register(self, chat_id):
+        """Заведение чата подписки до первого цикла опроса."""
+        with self.lock:
+            self.chats.setdefault(str(chat_id), ChatStatus(self.history_size))
+
+    def restore(self, chat_id, homeworks, current_date):
+        """Статусы домашек чата из сохранённого состояния подписки.
+
+        homeworks — словарь {имя домашки: статус}; история изменений
+        и время проверки не восстанавливаются.
+        """
+        with self.lock:
+            chat = self.chats.setdefault(
+                str(chat_id), ChatStatus(self.history_size)
+            )
+            chat.homeworks.update(homeworks)
+            if chat.current_date is None:
+                chat.current_date = current_date
+
+    def update(self, chat_id, homeworks, current_date):
+        """Запись результата цикла опроса: изменившиеся домашки и курсор."""
+        now = time.time()
+        with self.lock:
+            chat = self.chats.setdefault(
+                str(chat_id), ChatStatus(self.history_size)
+            )
+            for homework in homeworks:
+                name = homework.get('homework_name')
+                status = homework.get('status')
+                chat.homeworks[name] = status
+                chat.history.append((now, name, status))
+            chat.current_date = current_date
+            chat.checked_at = now
+
+    def get(self, chat_id):
+        """Состояние чата или None, если чат ещё не опрашивался."""
+        with self.lock:
+            chat = self.chats.get(str(chat_id))
+            if chat is None:
+                return None
+            snapshot = ChatStatus(self.history_size)
+            snapshot.homeworks = dict(chat.homeworks)
+            snapshot.history.extend(chat.history)
+            snapshot.current_date = chat.current_date
+            snapshot.checked_at = chat.checked_at
+            return snapshot
@@ -1,17 +1,111 @@
-from logging import Handler
-
-
-class TelegramHandler(Handler):
-    def __init__(self, bot, chat_id):
-        super().__init__()
-        self.bot = bot
-        self.chat_id = chat_id
-        self.previous_error = None
-
-    def emit(self, record):
-        message = self.format(record)
-        current_error = record.message
-
-        if current_error != self.previous_error:
-            self.bot.send_message(chat_id=self.chat_id, text=message)
-            self.previous_error = current_error
+import threading
+import time
+from collections import deque
+from logging import Handler
+
+from dedup import DedupStore
+
+WINDOW = 60 * 10
+MAX_FINGERPRINTS = 50
+MAX_MESSAGES = 20
+RATE_PERIOD = 60 * 60
+OTHER = 'Прочие ошибки'
+
+
+class TelegramHandler(Handler):
+    """Пересылка ошибок в Telegram с группировкой за окно времени.
+
+    Ошибка каждого вида отправляется сразу, если не отправлялась в этот
+    чат за последнее окно (по dedup), повторы только считаются, и по
+    окончании окна приходит одна сводка. Вид ошибки — атрибут записи
+    error_type, а без него — текст сообщения. Кроме того, за RATE_PERIOD
+    отправляется не больше max_messages сообщений.
+    """
+
+    def __init__(self, bot, chat_id, window=WINDOW,
+                 max_fingerprints=MAX_FINGERPRINTS,
+                 max_messages=MAX_MESSAGES, rate_period=RATE_PERIOD,
+                 dedup=None):
+        super().__init__()
+        self.bot = bot
+        self.chat_id = chat_id
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+        self.max_messages = max_messages
+        self.rate_period = rate_period
+        self.dedup = dedup if dedup is not None else DedupStore()
+        self.counts = {}
+        self.relayed = set()
+        self.sent_at = deque()
+        self.suppressed = 0
+        self.timer = None
+
+    def emit(self, record):
+        fingerprint = (
+            getattr(record, 'error_type', None) or record.getMessage()
+        )
+        if fingerprint not in self.counts:
+            if len(self.counts) >= self.max_fingerprints:
+                fingerprint = OTHER
+            else:
+                self.counts[fingerprint] = 0
+                self.start_window()
+                if not self.dedup.seen(
+                    self.chat_id, fingerprint, ttl=self.window
+                ):
+                    self.relayed.add(fingerprint)
+                    self.send(self.format(record))
+        self.counts[fingerprint] = self.counts.get(fingerprint, 0) + 1
+
+    def start_window(self):
+        if self.timer is None:
+            self.timer = threading.Timer(self.window, self.close_window)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def close_window(self):
+        self.acquire()
+        try:
+            counts, self.counts = self.counts, {}
+            relayed, self.relayed = self.relayed, set()
+            self.timer = None
+            summary = self.summary(counts, relayed)
+            self.suppressed = 0
+            if summary:
+                self.send(summary)
+        finally:
+            self.release()
+
+    def summary(self, counts, relayed):
+        # В сводку попадают ошибки, о которых чат ещё не знает: повторы
+        # отправленных и те, что в этом окне отсеял dedup.
+        minutes = round(self.window / 60)
+        lines = [
+            f'{fingerprint} ×{count} за {minutes} мин'
+            for fingerprint, count in counts.items()
+            if count > (fingerprint in relayed)
+        ]
+        if self.suppressed:
+            lines.append(
+                f'Не отправлено из-за ограничения частоты: {self.suppressed}'
+            )
+        return '\n'.join(lines)
+
+    def send(self, text):
+        now = time.monotonic()
+        while self.sent_at and now - self.sent_at[0] > self.rate_period:
+            self.sent_at.popleft()
+        if len(self.sent_at) >= self.max_messages:
+            self.suppressed += 1
+            return
+        self.sent_at.append(now)
+        try:
+            self.bot.send_message(chat_id=self.chat_id, text=text)
+        except Exception:
+            # Логировать нельзя: ошибка снова пришла бы в этот обработчик.
+            pass
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        super().close()
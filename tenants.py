@@ -0,0 +1,94 @@
+import hashlib
+import json
+
+from exceptions import TenantsConfigError
+from http_client import ResponseCache
+
+
+def homework_key(homework):
+    """Ключ домашки в индексе подписки: id, а без него — имя."""
+    return homework.get('id', homework.get('homework_name'))
+
+
+def token_digest(token):
+    """Устойчивый идентификатор токена, по которому токен не восстановить."""
+    return hashlib.sha256(str(token).encode()).hexdigest()[:16]
+
+
+class Tenant:
+    """Подписка: токен Практикума, чат Telegram и курсор запросов к API."""
+
+    __slots__ = ('token', 'chat_id', 'current_date', 'headers', 'cache',
+                 'homeworks', 'names', 'status', 'changed_at', 'failures',
+                 'cycle')
+
+    def __init__(self, token, chat_id, current_date=None):
+        self.token = token
+        self.chat_id = chat_id
+        self.current_date = current_date
+        self.headers = {'Authorization': f'OAuth {token}'}
+        self.cache = ResponseCache()
+        self.homeworks = {}
+        self.names = {}
+        self.status = None
+        self.changed_at = None
+        self.failures = 0
+        self.cycle = 0
+
+    @property
+    def key(self):
+        """Устойчивый идентификатор подписки без самого токена."""
+        return f'{self.chat_id}:{token_digest(self.token)}'
+
+    def record(self, changed):
+        """Учёт изменившихся домашек: их имена и статус подписки."""
+        for homework in changed:
+            self.names[homework_key(homework)] = homework.get('homework_name')
+        self.refresh_status()
+
+    def named_homeworks(self):
+        """Статусы домашек по именам; без известного имени — по ключу."""
+        return {
+            self.names.get(key) or str(key): status
+            for key, status in self.homeworks.items()
+        }
+
+    def refresh_status(self):
+        """Статус подписки по индексу домашек: 'reviewing' или None."""
+        self.status = (
+            'reviewing' if 'reviewing' in self.homeworks.values() else None
+        )
+
+    def __repr__(self):
+        return f'Tenant(chat_id={self.chat_id!r})'
+
+
+def load_tenants(path):
+    """Загрузка списка подписок из JSON-файла.
+
+    Формат: [{"token": "...", "chat_id": 123, "current_date": 0}, ...],
+    ключ current_date необязателен.
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+    except (OSError, json.decoder.JSONDecodeError) as error:
+        raise TenantsConfigError(
+            f'Не удалось прочитать файл подписок {path}: {error}'
+        )
+
+    if not isinstance(data, list):
+        raise TenantsConfigError('Файл подписок должен содержать список.')
+
+    tenants = []
+    for item in data:
+        try:
+            tenants.append(
+                Tenant(item['token'], item['chat_id'],
+                       item.get('current_date'))
+            )
+        except (KeyError, TypeError, AttributeError):
+            raise TenantsConfigError(
+                f'Некорректная запись в файле подписок: {item!r}'
+            )
+    return tenants
@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT_DIR = dirname(dirname(abspath(__file__)))
+
+PROBE = '''
+import json, os, sys, threading
+import homework
+print(json.dumps({
+    "modules": [m for m in ("requests", "telegram", "dotenv") if m in sys.modules],
+    "files": os.listdir("."),
+    "threads": threading.active_count(),
+}))
+'''
+
+
+class TestBootstrap:
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=tmp_path, check=True,
+            capture_output=True, text=True,
+            env={**os.environ, 'PYTHONPATH': ROOT_DIR}
+        ).stdout
+        result = json.loads(output)
+        assert result['files'] == [], (
+            'Импорт homework не должен создавать файлы'
+        )
+        assert result['modules'] == [], (
+            'Импорт homework не должен загружать requests, telegram и dotenv'
+        )
+        assert result['threads'] == 1
+
+    def test_bootstrap_is_cached(self, tmp_path, monkeypatch):
+        import homework
+
+        calls = []
+        monkeypatch.setattr(homework, 'setup_logging', calls.append)
+        monkeypatch.chdir(tmp_path)
+        homework.bootstrap.cache_clear()
+        try:
+            homework.bootstrap()
+            homework.bootstrap()
+        finally:
+            homework.bootstrap.cache_clear()
+        assert calls == [homework.log_pipeline]
+
+    def test_tenants_file_replaces_practicum_token(self, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', None)
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        monkeypatch.setattr(homework, 'TENANTS_FILE', None)
+        assert not homework.check_tokens()
+        monkeypatch.setattr(homework, 'TENANTS_FILE', 'tenants.json')
+        assert homework.check_tokens(), (
+            'С TENANTS_FILE переменная PRACTICUM_TOKEN не обязательна'
+        )
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', None)
+        assert not homework.check_tokens()
@@ -0,0 +1,96 @@
+import pytest
+
+from exceptions import CircuitOpenError, HTTPConnectionError, JSONContentError
+
+
+class Flaky:
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        result = self.results.pop(0) if self.results else 'ok'
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class TestCircuitBreaker:
+
+    def make_breaker(self, **kwargs):
+        from circuit_breaker import CircuitBreaker, RetryPolicy
+
+        return CircuitBreaker(
+            'api', policy=RetryPolicy(attempts=2, delay=0), **kwargs
+        )
+
+    def test_retry_policy(self):
+        breaker = self.make_breaker()
+
+        api = Flaky(HTTPConnectionError())
+        assert breaker.call(api) == 'ok'
+        assert api.calls == 2, 'Сетевую ошибку нужно повторить'
+
+        api = Flaky(JSONContentError())
+        with pytest.raises(JSONContentError):
+            breaker.call(api)
+        assert api.calls == 1, 'Ошибку содержимого повторять не нужно'
+        assert breaker.failures == 0
+
+    def test_open_and_half_open(self, monkeypatch):
+        from circuit_breaker import CLOSED, HALF_OPEN, OPEN
+
+        breaker = self.make_breaker(failure_threshold=2, reset_timeout=60)
+        down = Flaky(*[HTTPConnectionError()] * 4)
+        for _ in range(2):
+            with pytest.raises(HTTPConnectionError):
+                breaker.call(down)
+        assert breaker.state == OPEN
+
+        api = Flaky()
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.call(api)
+        assert api.calls == 0, 'При разомкнутом предохранителе запросов нет'
+        assert 0 < error.value.retry_after <= 60
+
+        breaker.opened_at -= 61
+        breaker.before_call()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(api)
+        assert api.calls == 0, 'Пробный запрос должен быть только один'
+
+        breaker.on_success()
+        assert breaker.state == CLOSED
+        assert breaker.call(api) == 'ok'
+
+    def test_shared_breaker(self):
+        from circuit_breaker import breaker_for
+
+        assert breaker_for('test-endpoint') is breaker_for('test-endpoint')
+
+    def test_rejected_token_does_not_open_breaker(self):
+        import homework
+        from exceptions import HTTPClientError
+        from tenants import Tenant
+
+        from tests.utils import MockResponse, MockSession
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            if headers['Authorization'] == 'OAuth revoked':
+                return MockResponse({'code': 'not_authenticated'}, 401)
+            return MockResponse({'homeworks': [], 'current_date': 500})
+
+        session = MockSession(mock_get)
+        breaker = self.make_breaker(failure_threshold=2)
+        for _ in range(5):
+            with pytest.raises(HTTPClientError):
+                homework.poll_tenant(Tenant('revoked', 1, 100), session,
+                                     breaker=breaker)
+        assert breaker.failures == 0, (
+            'Отклонённый токен одной подписки не должен считаться сбоем API'
+        )
+        assert homework.poll_tenant(Tenant('valid', 2, 100), session,
+                                    breaker=breaker) == []
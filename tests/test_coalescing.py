@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+from exceptions import HTTPConnectionError
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+class TestCoalescing:
+
+    def test_shared_token_single_request(self):
+        from engine import PollingEngine
+        from tenants import Tenant
+
+        calls = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            calls.append(headers['Authorization'])
+            time.sleep(0.05)
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 500,
+            })
+
+        tenants = [Tenant('a', 1, 0), Tenant('a', 2, 0), Tenant('a', 3, 0),
+                   Tenant('b', 4, 0)]
+        engine = PollingEngine(
+            tenants, MockBot(), session=MockSession(mock_get)
+        )
+
+        async def poll_and_send():
+            await engine.poll_all()
+            await engine.poll_all()
+            await engine.outbox.flush()
+
+        asyncio.run(poll_and_send())
+        assert calls.count('OAuth a') == 2, (
+            'Подписки с общим токеном должны опрашиваться одним запросом'
+        )
+        assert calls.count('OAuth b') == 2
+        assert sorted(chat for chat, _ in engine.bot.sent) == [1, 2, 3, 4], (
+            'Ответ должен дойти до каждого чата ровно один раз'
+        )
+
+    def test_ttl_and_errors(self):
+        from coalescing import Coalescer
+        from tenants import Tenant
+
+        coalescer = Coalescer([Tenant('a', 1), Tenant('a', 2)], ttl=60)
+        calls = []
+        started = threading.Event()
+
+        def request(cache):
+            calls.append(cache)
+            started.set()
+            time.sleep(0.05)
+            return {'homeworks': []}
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(coalescer.fetch('a', 0, request))
+        )
+        leader.start()
+        started.wait()
+        results.append(coalescer.fetch('a', 0, request))
+        leader.join()
+        results.append(coalescer.fetch('a', 0, request))
+        assert len(calls) == 1, (
+            'Ответ должен переиспользоваться в пределах TTL'
+        )
+        assert results[0] is results[1] is results[2]
+
+        def failing(cache):
+            calls.append(cache)
+            raise HTTPConnectionError('нет связи')
+
+        for _ in range(2):
+            try:
+                coalescer.fetch('a', 1, failing)
+            except HTTPConnectionError:
+                pass
+        assert len(calls) == 3, 'Ошибка не должна кэшироваться'
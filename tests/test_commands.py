@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+def make_update(update_id, chat_id, text):
+    message = SimpleNamespace(chat_id=chat_id, text=text)
+    return SimpleNamespace(update_id=update_id, message=message)
+
+
+class TestCommands:
+
+    def test_status_cache(self):
+        from status_cache import StatusCache
+
+        cache = StatusCache(history_size=2)
+        assert cache.get(1) is None, 'Незнакомый чат не должен быть в кэше'
+        cache.register(1)
+        assert cache.get('1').checked_at is None, (
+            'Зарегистрированный чат ещё не должен быть опрошен'
+        )
+        for status in ('reviewing', 'rejected', 'approved'):
+            cache.update(1, [{'homework_name': 'hw', 'status': status}], 100)
+        chat = cache.get(1)
+        assert chat.homeworks == {'hw': 'approved'}
+        assert [item[2] for item in chat.history] == [
+            'rejected', 'approved'
+        ], 'История должна быть ограничена по размеру'
+        assert chat.current_date == 100
+
+    def test_commands_do_not_call_api(self):
+        from commands import CommandServer
+        from engine import PollingEngine
+        from tenants import Tenant
+
+        calls = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            calls.append(params)
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 500,
+            })
+
+        engine = PollingEngine(
+            [Tenant('a', 1, 0)], MockBot(), session=MockSession(mock_get)
+        )
+        server = CommandServer(engine.bot, engine.status_cache, engine.outbox)
+
+        async def poll_and_ask():
+            await engine.poll_all()
+            for update_id, text in enumerate(('/status', '/history@bot')):
+                server.handle(make_update(update_id, 1, text))
+            server.handle(make_update(2, 2, '/status'))
+            server.handle(make_update(3, 1, 'привет'))
+            await engine.outbox.flush()
+
+        asyncio.run(poll_and_ask())
+        assert len(calls) == 1, 'Команды не должны обращаться к API'
+        # Чат 2 не ждёт, пока лимит чата 1 пропустит его сообщения.
+        sent = [text for chat_id, text in engine.bot.sent if chat_id == 1]
+        assert len(sent) == 3
+        assert 'Ура!' in sent[1] and 'Ура!' in sent[2]
+        sent = [text for chat_id, text in engine.bot.sent if chat_id == 2]
+        assert len(sent) == 1 and 'подписка не найдена' in sent[0]
+
+    def test_status_after_restart(self, tmp_path):
+        from commands import render_status
+        from engine import PollingEngine
+        from state_store import StateStore
+        from tenants import Tenant
+
+        path = str(tmp_path / 'state.sqlite3')
+        tenant = Tenant('a', 1, 500)
+        tenant.homeworks = {7: 'approved'}
+        tenant.record([{'id': 7, 'homework_name': 'hw', 'status': 'approved'}])
+        store = StateStore(path)
+        store.update(tenant)
+        store.close()
+
+        engine = PollingEngine(
+            [Tenant('a', 1)], MockBot(), store=StateStore(path),
+            spill_path=str(tmp_path / 'outbox.spill')
+        )
+        asyncio.run(engine.restore())
+        engine.store.close()
+        chat = engine.status_cache.get(1)
+        assert chat.homeworks == {'hw': 'approved'}, (
+            'После перезапуска /status должен показывать сохранённые статусы'
+        )
+        assert chat.current_date == 500
+        assert 'не менялись' not in render_status(chat)
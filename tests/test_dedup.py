@@ -0,0 +1,79 @@
+import logging
+import time
+
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+class TestDedup:
+
+    def test_lru_and_ttl(self):
+        from dedup import DedupStore
+
+        dedup = DedupStore(max_entries=3)
+        assert not dedup.seen(1, 'hw', 'approved')
+        assert dedup.seen(1, 'hw', 'approved'), (
+            'Повтор ключа должен распознаваться'
+        )
+        assert not dedup.seen(2, 'hw', 'approved')
+        assert not dedup.seen(1, 'hw', 'rejected')
+        dedup.seen(1, 'hw', 'approved')
+        assert not dedup.seen(3, 'hw', 'approved')
+        assert len(dedup) == 3, 'Число записей не должно превышать лимит'
+        assert dedup.seen(1, 'hw', 'approved'), (
+            'Недавно встречавшийся ключ не должен вытесняться'
+        )
+        assert not dedup.seen(2, 'hw', 'approved'), (
+            'Вытесняться должен давно не встречавшийся ключ'
+        )
+
+        assert not dedup.seen('error', ttl=0.05)
+        time.sleep(0.06)
+        assert not dedup.seen('error', ttl=0.05), (
+            'Просроченная запись должна считаться отсутствующей'
+        )
+
+    def test_duplicate_tenants_notify_once(self):
+        import homework
+        from dedup import DedupStore
+        from tenants import Tenant
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({
+                'homeworks': [{
+                    'id': 7, 'homework_name': 'hw', 'status': 'approved',
+                    'date_updated': '2020-02-13T14:40:57Z',
+                }],
+                'current_date': 500,
+            })
+
+        session = MockSession(mock_get)
+        dedup = DedupStore()
+        messages = [
+            homework.poll_tenant(tenant, session, dedup=dedup)
+            for tenant in (Tenant('a', 1, 100), Tenant('a', 1, 100),
+                           Tenant('a', 2, 100))
+        ]
+        assert [len(chat) for chat in messages] == [1, 0, 1], (
+            'Чат должен получить уведомление о статусе один раз'
+        )
+
+    def test_error_relay_across_windows(self):
+        from dedup import DedupStore
+        from telegram_handler import TelegramHandler
+
+        bot = MockBot()
+        handler = TelegramHandler(bot, 1, dedup=DedupStore())
+        logger = logging.getLogger('test_error_relay_across_windows')
+        logger.propagate = False
+        logger.addHandler(handler)
+        logger.error('first', extra={'error_type': 'HTTPConnectionError'})
+        handler.close_window()
+        logger.error('again', extra={'error_type': 'HTTPConnectionError'})
+        assert bot.texts == ['first'], (
+            'Ошибка, отправленная в прошлом окне, не должна повторяться'
+        )
+        handler.close_window()
+        assert bot.texts[-1] == 'HTTPConnectionError ×1 за 10 мин', (
+            'Отсеянная ошибка должна попасть в сводку'
+        )
+        handler.close()
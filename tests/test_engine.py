@@ -0,0 +1,262 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from exceptions import TenantsConfigError
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+HUNG_REQUEST = '''
+import asyncio, sys, time
+from engine import PollingEngine
+from tenants import Tenant
+
+
+class Session:
+    def get(self, url, **kwargs):
+        time.sleep(30)
+
+    def head(self, url, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+engine = PollingEngine([Tenant('a', 1, 0)], None, retry_time=1000,
+                       session=Session(), spill_path=sys.argv[1])
+
+
+async def serve_and_stop():
+    loop = asyncio.get_running_loop()
+    loop.call_later(0.1, engine.poll_now)
+    loop.call_later(0.3, engine.stop)
+    await engine.serve()
+
+asyncio.run(serve_and_stop())
+'''
+
+
+class TestEngine:
+
+    def test_load_tenants(self, tmp_path):
+        from tenants import load_tenants
+
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1},
+            {'token': 'b', 'chat_id': 2, 'current_date': 100},
+        ]))
+        tenants = load_tenants(path)
+        assert [t.chat_id for t in tenants] == [1, 2]
+        assert tenants[1].current_date == 100
+        assert tenants[0].headers == {'Authorization': 'OAuth a'}
+
+        path.write_text(json.dumps({'token': 'a'}))
+        try:
+            load_tenants(path)
+        except TenantsConfigError:
+            pass
+        else:
+            assert False, 'Ожидалась ошибка TenantsConfigError'
+
+    def test_poll_all_tenants(self):
+        from engine import PollingEngine
+        from tenants import Tenant
+
+        statuses = {'OAuth a': 'approved', 'OAuth b': 'rejected'}
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            status = statuses[headers['Authorization']]
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': status}],
+                'current_date': 500,
+            })
+
+        bot = MockBot()
+        tenants = [Tenant('a', 1, 0), Tenant('b', 2, 0)]
+        engine = PollingEngine(tenants, bot, session=MockSession(mock_get))
+
+        async def poll_and_send():
+            await engine.poll_all()
+            await engine.outbox.flush()
+
+        asyncio.run(poll_and_send())
+        assert sorted(chat for chat, _ in bot.sent) == [1, 2]
+        assert all(t.current_date == 500 for t in tenants)
+
+        asyncio.run(poll_and_send())
+        assert len(bot.sent) == 2, (
+            'Повторный опрос без изменений не должен отправлять сообщения'
+        )
+
+    def test_conditional_request(self):
+        import homework
+        from http_client import ResponseCache
+
+        data = {'homeworks': [], 'current_date': 1}
+        sent_headers = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            sent_headers.append(headers)
+            if headers.get('If-None-Match') == '"v1"' and len(sent_headers) > 2:
+                return MockResponse(None, status_code=304)
+            return MockResponse(data, headers={'ETag': '"v1"'})
+
+        session = MockSession(mock_get)
+        cache = ResponseCache()
+        headers = {'Authorization': 'OAuth a'}
+        assert homework.request_api_answer(headers, 1, session, cache) == data
+        assert sent_headers[0] == headers
+
+        assert homework.request_api_answer(headers, 1, session, cache) is None, (
+            'Ответ с тем же телом не должен разбираться повторно'
+        )
+        assert sent_headers[1]['If-None-Match'] == '"v1"'
+        assert homework.request_api_answer(headers, 1, session, cache) is None
+
+    def test_diff_homeworks(self):
+        import homework
+
+        index = {}
+        homeworks = [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+        ]
+        messages = homework.diff_homeworks(index, homeworks)
+        assert len(messages) == 2, (
+            'Проверьте, что сообщение формируется для каждой изменившейся '
+            'домашки, а не только для первой'
+        )
+        assert index == {1: 'reviewing', 2: 'approved'}
+
+        homeworks[0]['status'] = 'rejected'
+        messages = homework.diff_homeworks(index, homeworks)
+        assert messages == [homework.parse_status(homeworks[0])]
+        assert homework.diff_homeworks(index, homeworks) == []
+
+    def test_state_store(self, tmp_path):
+        from state_store import StateStore
+        from tenants import Tenant
+
+        path = tmp_path / 'state.sqlite3'
+        store = StateStore(str(path), batch_size=2)
+        tenant = Tenant('a', 1, 100)
+        tenant.homeworks = {1: 'approved', 'hw2': 'reviewing'}
+        tenant.changed_at = 1000.5
+        assert not store.update(tenant)
+        assert store.update(Tenant('b', 2, 200)), (
+            'При заполнении пачки store.update должен требовать записи'
+        )
+        assert store.flush() == 2
+        store.close()
+
+        restored = [Tenant('a', 1), Tenant('c', 3)]
+        store = StateStore(str(path))
+        assert store.load(restored) == 1
+        assert restored[0].current_date == 100
+        assert restored[0].homeworks == {1: 'approved', 'hw2': 'reviewing'}
+        assert restored[0].status == 'reviewing', (
+            'Статус подписки должен выводиться из восстановленных домашек'
+        )
+        assert restored[0].changed_at == 1000.5, (
+            'Время последнего изменения должно сохраняться в базе'
+        )
+        assert restored[1].current_date is None
+        store.close()
+
+    def test_state_store_migrates_old_schema(self, tmp_path):
+        import sqlite3
+
+        from state_store import StateStore
+        from tenants import Tenant
+
+        path = str(tmp_path / 'state.sqlite3')
+        with sqlite3.connect(path) as connection:
+            connection.execute(
+                'CREATE TABLE cursors (tenant TEXT PRIMARY KEY, '
+                'from_date INTEGER)'
+            )
+            connection.execute(
+                'INSERT INTO cursors VALUES (?, ?)', (Tenant('a', 1).key, 100)
+            )
+        connection.close()
+
+        store = StateStore(path)
+        restored = [Tenant('a', 1)]
+        assert store.load(restored) == 1
+        assert restored[0].changed_at is None
+        restored[0].changed_at = 2000.0
+        store.update(restored[0])
+        store.close()
+
+        restored = [Tenant('a', 1)]
+        store = StateStore(path)
+        store.load(restored)
+        store.close()
+        assert restored[0].changed_at == 2000.0, (
+            'В базе старой версии должен появиться столбец changed_at'
+        )
+
+    def test_graceful_shutdown(self, tmp_path):
+        from engine import PollingEngine
+        from state_store import StateStore
+        from tenants import Tenant
+
+        calls = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            calls.append(headers['Authorization'])
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 500,
+            })
+
+        store = StateStore(str(tmp_path / 'state.sqlite3'))
+        engine = PollingEngine(
+            [Tenant('a', 1, 0), Tenant('b', 1, 0)], MockBot(),
+            retry_time=1000, session=MockSession(mock_get), store=store
+        )
+        engine.outbox.spill_path = str(tmp_path / 'outbox.spill')
+
+        async def serve_and_stop():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.2, engine.poll_now)
+            loop.call_later(0.4, engine.stop)
+            await engine.serve()
+            return loop.time()
+
+        started = time.monotonic()
+        asyncio.run(serve_and_stop())
+        assert time.monotonic() - started < 1.4, (
+            'Остановка должна занимать меньше секунды'
+        )
+        assert calls.count('OAuth b') == 1, (
+            'poll_now должен запускать опрос, не дожидаясь интервала'
+        )
+        assert len(engine.bot.sent) == 1
+        with open(engine.outbox.spill_path, encoding='utf-8') as file:
+            assert len(file.readlines()) == 1, (
+                'Недосланное сообщение должно сохраниться на диск'
+            )
+
+        restored = [Tenant('a', 1), Tenant('b', 1)]
+        store = StateStore(str(tmp_path / 'state.sqlite3'))
+        assert store.load(restored) == 2
+        assert [tenant.current_date for tenant in restored] == [500, 500]
+        store.close()
+
+    def test_process_exits_with_hung_request(self, tmp_path):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        started = time.monotonic()
+        subprocess.run(
+            [sys.executable, '-c', HUNG_REQUEST, str(tmp_path / 'spill')],
+            cwd=tmp_path, check=True, capture_output=True, timeout=60,
+            env={**os.environ, 'PYTHONPATH': root}
+        )
+        assert time.monotonic() - started < 10, (
+            'Зависший запрос к API не должен задерживать выход процесса'
+        )
@@ -0,0 +1,43 @@
+import asyncio
+
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+class TestJournal:
+
+    def test_engine_records_traffic(self, tmp_path):
+        from engine import PollingEngine
+        from journal import Journal, RecordingBot, read_journal
+        from tenants import Tenant
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 500,
+            })
+
+        for name in ('journal.jsonl', 'journal.jsonl.gz'):
+            path = str(tmp_path / name)
+            journal = Journal(path)
+            bot = MockBot()
+            engine = PollingEngine(
+                [Tenant('secret', 1, 100)], RecordingBot(bot, journal),
+                session=MockSession(mock_get), journal=journal
+            )
+
+            async def poll_and_send():
+                await engine.poll_all()
+                await engine.outbox.flush()
+
+            asyncio.run(poll_and_send())
+            journal.close()
+
+            api, send = list(read_journal(path))
+            assert api['kind'] == 'api' and api['status'] == 200
+            assert api['params'] == {'from_date': 100}
+            assert '"approved"' in api['body']
+            assert 'secret' not in str(api), (
+                'Токен не должен попадать в журнал'
+            )
+            assert (send['kind'], send['chat_id']) == ('send', 1)
+            assert send['text'] == bot.sent[0][1]
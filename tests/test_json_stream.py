@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+from exceptions import JSONContentError, JSONConvertError
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestHomeworkStream:
+
+    @pytest.mark.parametrize('size', [1, 7, 1024])
+    def test_stream_matches_json(self, size):
+        from json_stream import HomeworkStream
+
+        data = {
+            'homeworks': [
+                {'id': i, 'homework_name': f'работа {i}', 'status': 'approved'}
+                for i in range(20)
+            ],
+            'current_date': 1234567890,
+        }
+        body = json.dumps(data, ensure_ascii=False).encode()
+        stream = HomeworkStream(chunked(body, size))
+        assert list(stream) == data['homeworks'], (
+            'Потоковый разбор должен выдавать те же домашки, что и json()'
+        )
+        assert stream.fields == {'current_date': 1234567890}
+
+    @pytest.mark.parametrize('body, error', [
+        (b'{"current_date": 1}', JSONContentError),
+        (b'{"homeworks": {}}', JSONContentError),
+        (b'{"homeworks": [1]}', JSONContentError),
+        (b'{"homeworks": [{"id": 1}', JSONConvertError),
+        (b'<html>', JSONConvertError),
+    ])
+    def test_invalid_body(self, body, error):
+        from json_stream import HomeworkStream
+
+        with pytest.raises(error):
+            list(HomeworkStream([body]))
+
+    @pytest.mark.parametrize('raised, error', [
+        ('ConnectionError', 'HTTPConnectionError'),
+        ('ChunkedEncodingError', 'HTTPConnectionError'),
+        ('ReadTimeout', 'HTTPTimeoutError'),
+    ])
+    def test_read_errors(self, raised, error):
+        import requests
+
+        import exceptions
+        from json_stream import HomeworkStream
+
+        def chunks():
+            yield b'{"homeworks": ['
+            raise getattr(requests.exceptions, raised)('connection lost')
+
+        with pytest.raises(getattr(exceptions, error)):
+            list(HomeworkStream(chunks()))
+
+
+class StreamResponse:
+
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {}
+        self.closed = False
+
+    def iter_content(self, size):
+        return chunked(self.body, size)
+
+    def close(self):
+        self.closed = True
+
+
+class StreamSession:
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def get(self, url, **kwargs):
+        return self.responses.pop(0)
+
+
+class TestStreamPolling:
+
+    def test_stream_responses_are_closed(self):
+        import homework
+        from exceptions import HTTPConnectionError
+        from http_client import ResponseCache
+
+        not_modified = StreamResponse(b'', 304)
+        failed = StreamResponse(b'', 500)
+        session = StreamSession(not_modified, failed)
+        assert homework.stream_api_answer(
+            {}, 100, session, ResponseCache()
+        ) is None
+        with pytest.raises(HTTPConnectionError):
+            homework.stream_api_answer({}, 100, session, ResponseCache())
+        assert not_modified.closed and failed.closed, (
+            'Непрочитанный потоковый ответ должен возвращать соединение'
+        )
+
+    def test_broken_stream_keeps_index(self):
+        import homework
+        from tenants import Tenant
+
+        body = json.dumps({
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+            ],
+            'current_date': 500,
+        }).encode()
+        broken = StreamResponse(body[:body.index(b'{"id": 2')] + b'{')
+        complete = StreamResponse(body)
+        session = StreamSession(broken, complete)
+        tenant = Tenant('a', 1, 100)
+
+        with pytest.raises(JSONConvertError):
+            homework.poll_tenant(tenant, session, stream=True)
+        assert broken.closed
+        assert tenant.homeworks == {}, (
+            'Статусы из недочитанного ответа не должны попадать в индекс'
+        )
+        messages = homework.poll_tenant(tenant, session, stream=True)
+        assert len(messages) == 2, (
+            'Повтор после ошибки разбора должен уведомить об изменениях'
+        )
+        assert tenant.homeworks == {1: 'approved', 2: 'approved'}
+        assert complete.closed
@@ -0,0 +1,90 @@
+import logging
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestLogConfig:
+
+    def test_pipeline_delivers_records(self):
+        from log_config import LogPipeline
+
+        logger = logging.getLogger('test_pipeline_delivers_records')
+        logger.setLevel(logging.DEBUG)
+        handler = ListHandler()
+        pipeline = LogPipeline(logger, handler)
+        pipeline.start()
+        errors = ListHandler()
+        pipeline.add_handler(errors, logging.ERROR)
+        logger.info('info')
+        logger.error('error')
+        pipeline.stop()
+        assert handler.messages == ['info', 'error']
+        assert errors.messages == ['error']
+
+    def test_full_queue_drops_records(self):
+        from log_config import LogPipeline
+
+        logger = logging.getLogger('test_full_queue_drops_records')
+        logger.setLevel(logging.DEBUG)
+        handler = ListHandler()
+        pipeline = LogPipeline(logger, handler, maxsize=2)
+        logger.info('first')
+        logger.info('second')
+        logger.info('dropped')
+        logger.error('error')
+        assert pipeline.dropped == 2
+        pipeline.start()
+        pipeline.stop()
+        assert handler.messages == ['second', 'error'], (
+            'Ошибка должна вытеснять самую старую запись, '
+            'а остальные записи отбрасываться'
+        )
+
+    def test_json_records_with_context(self):
+        import json
+
+        from log_config import ContextFilter, JsonFormatter, log_context
+
+        record = logging.LogRecord(
+            'test', logging.ERROR, __file__, 1, 'Ответ: %s', ('ok',), None
+        )
+        token = log_context.set(('1:abc', 7))
+        try:
+            ContextFilter().filter(record)
+        finally:
+            log_context.reset(token)
+        record.error_type = 'HTTPConnectionError'
+        data = json.loads(JsonFormatter().format(record))
+        assert data['message'] == 'Ответ: ok'
+        assert (data['tenant'], data['cycle']) == ('1:abc', 7), (
+            'Запись должна содержать подписку и цикл опроса'
+        )
+        assert data['error_type'] == 'HTTPConnectionError'
+
+    def test_sampling_keeps_errors(self):
+        from log_config import LogPipeline, SamplingFilter
+
+        logger = logging.getLogger('test_sampling_keeps_errors')
+        logger.setLevel(logging.DEBUG)
+        handler = ListHandler()
+        pipeline = LogPipeline(logger, handler)
+        pipeline.handler.addFilter(SamplingFilter(period=60, burst=1))
+        for number in range(5):
+            logger.info('Ответ от API получен: %d.', number)
+            logger.error('Сбой: %d.', number)
+        assert pipeline.queue.queue[0].args == (0,), (
+            'Сообщение должно форматироваться в потоке обработчиков'
+        )
+        pipeline.start()
+        pipeline.stop()
+        assert handler.messages == ['Ответ от API получен: 0.'] + [
+            f'Сбой: {number}.' for number in range(5)
+        ], 'Повторы INFO должны прореживаться, ошибки — сохраняться'
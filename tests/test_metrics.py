@@ -0,0 +1,44 @@
+import requests
+
+
+class TestMetrics:
+
+    def test_histogram_render(self):
+        from metrics import Counter, Histogram, Registry
+
+        registry = Registry()
+        histogram = registry.register(
+            Histogram('test_seconds', 'Тест.', buckets=(0.1, 1))
+        )
+        counter = registry.register(
+            Counter('test_total', 'Тест.', ('status',))
+        )
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(3)
+        counter.inc('200')
+        counter.inc('200')
+
+        text = registry.render()
+        assert 'test_seconds_bucket{le="0.1"} 2\n' in text
+        assert 'test_seconds_bucket{le="1"} 2\n' in text
+        assert 'test_seconds_bucket{le="+Inf"} 3\n' in text
+        assert 'test_seconds_count 3\n' in text
+        assert 'test_total{status="200"} 2\n' in text
+
+    def test_metrics_endpoint(self):
+        from metrics import start_metrics_server
+
+        server = start_metrics_server(0)
+        try:
+            port = server.server_address[1]
+            response = requests.get(f'http://127.0.0.1:{port}/metrics')
+            assert response.status_code == 200
+            for exception in ('HTTPConnectionError', 'JSONConvertError',
+                              'JSONContentError', 'ParsingError'):
+                assert (
+                    f'bot_errors_total{{exception="{exception}"}}'
+                    in response.text
+                ), f'Нет счётчика для исключения {exception}'
+        finally:
+            server.shutdown()
@@ -0,0 +1,153 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from telegram.error import BadRequest, RetryAfter
+
+
+class FlakyBot:
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.errors.get(chat_id):
+            raise self.errors[chat_id].pop(0)
+        self.sent.append((chat_id, text))
+
+
+class TestOutbox:
+
+    def test_token_bucket(self):
+        from outbox import TokenBucket
+
+        bucket = TokenBucket(rate=10, capacity=2)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert 0.09 < bucket.reserve() <= 0.1, (
+            'Когда запас исчерпан, нужно ждать появления следующего токена'
+        )
+
+    def test_retry_after_and_errors(self, tmp_path):
+        from outbox import Outbox
+
+        bot = FlakyBot({
+            1: [RetryAfter(0)],
+            2: [BadRequest('chat not found')],
+        })
+        outbox = Outbox(bot, ThreadPoolExecutor(1),
+                        spill_path=str(tmp_path / 'spill'), chat_rate=1000)
+
+        async def send():
+            outbox.put(1, 'first')
+            outbox.put(2, 'second')
+            await outbox.flush()
+
+        asyncio.run(send())
+        assert bot.sent == [(1, 'first')], (
+            'После RetryAfter сообщение нужно отправить повторно'
+        )
+        assert outbox.failed == 1
+
+    def test_spill_to_disk(self, tmp_path):
+        from outbox import Outbox
+
+        bot = FlakyBot()
+        spill_path = tmp_path / 'spill'
+        outbox = Outbox(bot, ThreadPoolExecutor(1), maxsize=2,
+                        spill_path=str(spill_path), chat_rate=1000)
+
+        async def send():
+            for number in range(5):
+                outbox.put(1, str(number))
+            assert outbox.spilled == 3
+            assert spill_path.exists()
+            await outbox.flush()
+
+        asyncio.run(send())
+        assert [text for _, text in bot.sent] == ['0', '1', '2', '3', '4']
+        assert not spill_path.exists()
+
+    def test_spilled_messages_keep_order(self, tmp_path):
+        from outbox import Outbox
+
+        bot = FlakyBot()
+        outbox = Outbox(bot, ThreadPoolExecutor(1), maxsize=4,
+                        spill_path=str(tmp_path / 'spill'), chat_rate=1000)
+
+        async def send():
+            for number in range(4):
+                outbox.put(1, str(number))
+            outbox.put(1, 'reviewing')
+            await outbox.send_next(await outbox.ready.get())
+            assert outbox.size < outbox.maxsize and outbox.spilled
+            outbox.put(1, 'approved')
+            await outbox.flush()
+
+        asyncio.run(send())
+        assert [text for _, text in bot.sent[-2:]] == [
+            'reviewing', 'approved'
+        ], (
+            'Новое сообщение не должно обгонять отложенные на диск'
+        )
+
+    def test_drain_keeps_order(self, tmp_path):
+        import json
+        import time
+
+        from outbox import Outbox
+
+        class SlowBot(FlakyBot):
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                time.sleep(0.3)
+
+        spill_path = tmp_path / 'spill'
+        outbox = Outbox(SlowBot(), ThreadPoolExecutor(4), maxsize=3,
+                        senders=4, spill_path=str(spill_path),
+                        chat_rate=1000)
+
+        async def send_and_drain():
+            for text in ('reviewing', 'approved', 'rejected', 'newest'):
+                outbox.put(1, text)
+            run = asyncio.ensure_future(outbox.run())
+            await asyncio.sleep(0.05)
+            await outbox.drain(0)
+            run.cancel()
+
+        asyncio.run(send_and_drain())
+        with open(spill_path, encoding='utf-8') as file:
+            texts = [json.loads(line)[1] for line in file]
+        assert texts == ['reviewing', 'approved', 'rejected', 'newest'], (
+            'При остановке сообщения чата должны сохраниться по порядку'
+        )
+
+    def test_busy_chat_does_not_block_others(self, tmp_path):
+        import time
+
+        from outbox import Outbox
+
+        bot = FlakyBot()
+        outbox = Outbox(bot, ThreadPoolExecutor(4), chat_rate=10,
+                        spill_path=str(tmp_path / 'spill'))
+
+        async def send():
+            for number in range(6):
+                outbox.put(1, str(number))
+            for chat_id in range(2, 6):
+                outbox.put(chat_id, 'hello')
+            run = asyncio.ensure_future(outbox.run())
+            started = time.monotonic()
+            while len({chat_id for chat_id, _ in bot.sent}) < 5:
+                await asyncio.sleep(0.01)
+            elapsed = time.monotonic() - started
+            await outbox.drain(1)
+            run.cancel()
+            return elapsed
+
+        assert asyncio.run(send()) < 0.2, (
+            'Очередь одного чата не должна задерживать остальные'
+        )
+        assert [text for chat_id, text in bot.sent if chat_id == 1] == [
+            str(number) for number in range(6)
+        ]
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import pstats
+
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+class TestProfiling:
+
+    def test_engine_profile(self, tmp_path):
+        import homework
+        import outbox
+        from engine import PollingEngine
+        from profiling import Profiler
+        from tenants import Tenant
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 500,
+            })
+
+        original = homework.check_response
+        path = str(tmp_path / 'bot.prof')
+        profiler = Profiler(path, cycles=1)
+        profiler.start()
+        engine = PollingEngine(
+            [Tenant('a', 1, 0), Tenant('b', 2, 0)], MockBot(),
+            retry_time=1000, session=MockSession(mock_get),
+            spill_path=str(tmp_path / 'outbox.spill'), profiler=profiler
+        )
+
+        async def serve_and_stop():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.1, engine.poll_now)
+            loop.call_later(0.4, engine.stop)
+            await engine.serve()
+
+        asyncio.run(serve_and_stop())
+        assert homework.check_response is original, (
+            'После остановки функции этапов должны быть исходными'
+        )
+        assert outbox.send.__name__ == 'send'
+        assert profiler.profiled == 1, (
+            'Профилироваться должно не больше cycles циклов'
+        )
+        stats = pstats.Stats(path)
+        assert any(
+            function == 'poll_tenant' for _, _, function in stats.stats
+        )
+        with open(f'{path}.stages.json', encoding='utf-8') as file:
+            report = json.load(file)
+        stages = report['stages']
+        for stage in ('get_api_answer', 'check_response', 'parse_status',
+                      'send_message'):
+            assert stages[stage]['calls'] == 2, (
+                f'Время этапа {stage} должно учитываться в каждом цикле'
+            )
+        assert stages['get_api_answer']['wall'] > 0
+
+    def test_one_profiled_cycle_at_a_time(self, tmp_path):
+        import threading
+
+        from profiling import Profiler
+
+        profiler = Profiler(str(tmp_path / 'bot.prof'), cycles=10)
+        entered = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            entered.set()
+            release.wait(5)
+            return 'slow'
+
+        thread = threading.Thread(target=profiler.run, args=(slow,))
+        thread.start()
+        entered.wait(5)
+        assert profiler.run(lambda: 'fast') == 'fast'
+        assert profiler.profiled == 1, (
+            'Цикл во время профилируемого должен идти без профиля'
+        )
+        release.set()
+        thread.join()
+        profiler.run(lambda: 'next')
+        assert profiler.profiled == 2
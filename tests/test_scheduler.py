@@ -0,0 +1,66 @@
+import time
+
+from exceptions import HTTPConnectionError, ParsingError
+
+
+class TestScheduler:
+
+    def test_adaptive_intervals(self):
+        from scheduler import DAY, AdaptivePolicy, Scheduler
+        from tenants import Tenant
+
+        policy = AdaptivePolicy(default=600, reviewing=120, idle=1800,
+                                backoff_base=30, backoff_max=300)
+        scheduler = Scheduler(policy, baseline=600)
+        tenant = Tenant('a', 1)
+
+        assert scheduler.next_delay(tenant) == 600
+
+        tenant.status = 'reviewing'
+        assert scheduler.next_delay(tenant) == 120
+
+        tenant.status = 'approved'
+        tenant.changed_at = time.time() - 4 * DAY
+        assert scheduler.next_delay(tenant) == 1800
+
+        delays = [
+            scheduler.next_delay(tenant, HTTPConnectionError())
+            for _ in range(5)
+        ]
+        assert tenant.failures == 5
+        assert 15 <= delays[0] <= 30
+        assert 150 <= delays[-1] <= 300, (
+            'Задержка после ошибок должна расти и ограничиваться максимумом'
+        )
+
+        assert scheduler.next_delay(tenant, ParsingError()) == 1800
+        assert tenant.failures == 0
+
+    def test_saved_requests(self):
+        from scheduler import FixedPolicy, Scheduler
+        from tenants import Tenant
+
+        scheduler = Scheduler(FixedPolicy(1200), baseline=600)
+        tenant = Tenant('a', 1)
+        for _ in range(10):
+            scheduler.next_delay(tenant)
+        assert scheduler.saved == 10
+        assert 'сэкономлено: 10' in scheduler.report()
+
+    def test_idle_after_first_poll(self, monkeypatch):
+        import homework
+        from scheduler import DAY, AdaptivePolicy
+        from tenants import Tenant
+
+        monkeypatch.setattr(
+            homework, 'fetch_response',
+            lambda *args: {'homeworks': [], 'current_date': 500}
+        )
+        policy = AdaptivePolicy(default=600, idle=1800, idle_after=DAY)
+        tenant = Tenant('a', 1)
+        assert homework.poll_tenant(tenant) == []
+        assert tenant.changed_at is not None, (
+            'Отсчёт простоя должен начинаться с первого успешного опроса'
+        )
+        tenant.changed_at -= 2 * DAY
+        assert policy.next_interval(tenant) == 1800
@@ -0,0 +1,35 @@
+import pytest
+
+from exceptions import JSONContentError
+
+
+class TestCheckResponse:
+
+    @pytest.mark.parametrize('response', [
+        {},
+        {'homeworks': None},
+        {'homeworks': [{'homework_name': 'hw', 'status': 'approved'}, 'hw']},
+        {'homeworks': [{'homework_name': 'hw'}, {'homework_name': 1}]},
+        {'homeworks': [{'id': '1', 'status': 'approved'}]},
+    ])
+    def test_invalid_response(self, response):
+        import homework
+
+        with pytest.raises(JSONContentError):
+            homework.check_response(response)
+
+    def test_invalid_response_type(self):
+        import homework
+
+        with pytest.raises(TypeError):
+            homework.check_response([{'homeworks': []}])
+
+    def test_valid_response(self):
+        import homework
+
+        homeworks = [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2'},
+            {'id': 3, 'status': 'unknown', 'reviewer_comment': None},
+        ]
+        assert homework.check_response({'homeworks': homeworks}) is homeworks
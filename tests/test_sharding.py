@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections import Counter
+
+from tests.utils import MockBot, MockResponse, MockSession
+
+
+def make_tenants(count):
+    from tenants import Tenant
+
+    return [Tenant(f'token{number}', number) for number in range(count)]
+
+
+def make_coordinator(path, worker, ttl=30):
+    from sharding import LeaseStore, ShardCoordinator
+
+    return ShardCoordinator(LeaseStore(str(path), worker, ttl), ttl)
+
+
+class TestSharding:
+
+    def test_ring_moves_few_keys(self):
+        from sharding import HashRing
+
+        keys = [f'key{number}' for number in range(2000)]
+        ring = HashRing(['a', 'b', 'c'])
+        owners = {key: ring.owner(key) for key in keys}
+        shares = [list(owners.values()).count(node) for node in 'abc']
+        assert min(shares) > len(keys) / 6, (
+            'Ключи должны распределяться по воркерам примерно поровну'
+        )
+        bigger = HashRing(['a', 'b', 'c', 'd'])
+        moved = [key for key in keys if bigger.owner(key) != owners[key]]
+        assert all(bigger.owner(key) == 'd' for key in moved), (
+            'При добавлении воркера ключи должны переходить только к нему'
+        )
+        assert len(moved) < len(keys) / 2
+
+    def test_workers_split_tenants(self, tmp_path):
+        path = tmp_path / 'leases.sqlite3'
+        tenants = make_tenants(50)
+        first = make_coordinator(path, 'first')
+        second = make_coordinator(path, 'second')
+
+        gained = first.rebalance(tenants)
+        assert len(gained) == len(tenants), (
+            'Единственный воркер должен получить все подписки'
+        )
+        second.rebalance(tenants)
+        first.rebalance(tenants)
+        second.rebalance(tenants)
+        assert first.owned and second.owned
+        assert not first.owned & second.owned, (
+            'Два воркера не должны удерживать одну подписку'
+        )
+        assert first.owned | second.owned == {
+            tenant.key for tenant in tenants
+        }
+        assert all(first.owns(key) for key in first.owned)
+
+        first.close()
+        assert not first.owns(tenants[0].key)
+        second.rebalance(tenants)
+        assert len(second.owned) == len(tenants), (
+            'Подписки остановленного воркера должны перейти к живому'
+        )
+
+    def test_failover_after_lease_expires(self, tmp_path):
+        path = tmp_path / 'leases.sqlite3'
+        tenants = make_tenants(20)
+        ttl = 0.3
+        crashed = make_coordinator(path, 'crashed', ttl)
+        alive = make_coordinator(path, 'alive', ttl)
+        crashed.rebalance(tenants)
+        alive.rebalance(tenants)
+        assert len(alive.owned) < len(tenants)
+
+        time.sleep(ttl * 0.8)
+        assert not crashed.owns(tenants[0].key), (
+            'Без продления воркер должен перестать опрашивать подписки '
+            'раньше, чем истечёт аренда в базе'
+        )
+        time.sleep(ttl / 3)
+        gained = alive.rebalance(tenants)
+        assert gained and len(alive.owned) == len(tenants), (
+            'Подписки упавшего воркера должны перейти к живому'
+        )
+
+    def test_engines_do_not_double_notify(self, tmp_path):
+        from engine import PollingEngine
+        from state_store import StateStore
+
+        tenants_count = 10
+        polls = Counter()
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            polls[headers['Authorization']] += 1
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 500,
+            })
+
+        engines = []
+        for worker in ('first', 'second'):
+            engine = PollingEngine(
+                make_tenants(tenants_count), MockBot(), retry_time=1000,
+                session=MockSession(mock_get),
+                store=StateStore(str(tmp_path / 'state.sqlite3')),
+                shard=make_coordinator(tmp_path / 'state.sqlite3', worker),
+                spill_path=str(tmp_path / f'{worker}.spill')
+            )
+            engines.append(engine)
+
+        async def serve_both():
+            loop = asyncio.get_running_loop()
+            for engine in engines:
+                loop.call_later(0.2, engine.poll_now)
+                loop.call_later(0.4, engine.stop)
+            await asyncio.gather(*(engine.serve() for engine in engines))
+
+        asyncio.run(serve_both())
+        assert len(polls) == tenants_count
+        assert set(polls.values()) == {1}, (
+            'Каждую подписку должен опрашивать только один воркер'
+        )
+        sent = sum(len(engine.bot.sent) for engine in engines)
+        assert sent == tenants_count, (
+            'Каждый чат должен получить уведомление ровно один раз'
+        )
+
+    def test_lost_tenant_state_is_not_written(self, tmp_path):
+        from state_store import StateStore
+
+        path = str(tmp_path / 'state.sqlite3')
+        ttl = 0.3
+        tenants = make_tenants(1)
+        old_owner = make_coordinator(path, 'old', ttl)
+        old_owner.rebalance(tenants)
+        old_store = StateStore(path)
+        tenants[0].current_date = 100
+        old_store.update(tenants[0])
+
+        time.sleep(ttl * 1.2)
+        new_owner = make_coordinator(path, 'new', ttl)
+        new_tenants = make_tenants(1)
+        assert new_owner.rebalance(new_tenants)
+        new_tenants[0].current_date = 900
+        new_store = StateStore(path)
+        new_store.update(new_tenants[0])
+        new_store.close(new_owner.owns)
+
+        old_store.close(old_owner.owns)
+        restored = make_tenants(1)
+        store = StateStore(path)
+        store.load(restored)
+        store.close()
+        assert restored[0].current_date == 900, (
+            'Воркер без аренды не должен затирать состояние нового владельца'
+        )
+
+    def test_gained_tenants_fill_status_cache(self, tmp_path):
+        from engine import PollingEngine
+        from state_store import StateStore
+
+        path = str(tmp_path / 'state.sqlite3')
+        saved = make_tenants(1)[0]
+        saved.homeworks = {'hw': 'reviewing'}
+        store = StateStore(path)
+        store.update(saved)
+        store.close()
+
+        engine = PollingEngine(
+            make_tenants(1), MockBot(), store=StateStore(path),
+            shard=make_coordinator(path, 'worker'),
+            spill_path=str(tmp_path / 'outbox.spill')
+        )
+        asyncio.run(engine.rebalance())
+        engine.shard.close()
+        engine.store.close()
+        assert engine.status_cache.get(0).homeworks == {'hw': 'reviewing'}, (
+            'Статусы перешедших подписок должны попадать в кэш команд'
+        )
+        assert engine.tenants[0].status == 'reviewing'
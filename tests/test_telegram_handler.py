@@ -0,0 +1,54 @@
+import logging
+
+from tests.utils import MockBot
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.ERROR)
+    logger.propagate = False
+    logger.addHandler(handler)
+    return logger
+
+
+class TestTelegramHandler:
+
+    def test_alternating_errors_are_aggregated(self):
+        from telegram_handler import TelegramHandler
+
+        bot = MockBot()
+        handler = TelegramHandler(bot, 1, window=600)
+        logger = make_logger('test_alternating_errors', handler)
+        for _ in range(5):
+            logger.error('first', extra={'error_type': 'HTTPConnectionError'})
+            logger.error('second', extra={'error_type': 'JSONConvertError'})
+        assert bot.texts == ['first', 'second'], (
+            'Чередующиеся ошибки должны отправляться один раз за окно'
+        )
+
+        handler.close_window()
+        assert bot.texts[-1] == (
+            'HTTPConnectionError ×5 за 10 мин\nJSONConvertError ×5 за 10 мин'
+        )
+        handler.close()
+
+    def test_rate_limit_and_fingerprint_cap(self):
+        from telegram_handler import OTHER, TelegramHandler
+
+        bot = MockBot()
+        handler = TelegramHandler(bot, 1, max_fingerprints=3,
+                                  max_messages=2)
+        logger = make_logger('test_rate_limit', handler)
+        for number in range(10):
+            logger.error(f'error {number}')
+        assert bot.texts == ['error 0', 'error 1']
+        assert len(handler.counts) == 4
+        assert handler.counts[OTHER] == 7
+
+        handler.sent_at.clear()
+        handler.close_window()
+        assert bot.texts[-1] == (
+            f'{OTHER} ×7 за 10 мин\n'
+            'Не отправлено из-за ограничения частоты: 1'
+        )
+        handler.close()
@@ -0,0 +1,67 @@
+import itertools
+import threading
+import time
+
+import requests
+
+from exceptions import HTTPConnectionError, HTTPTimeoutError
+from tests.utils import MockResponse, MockSession
+
+
+class TestTimeouts:
+
+    def test_timeout_is_distinct_error(self):
+        import homework
+        from http_client import Deadline
+
+        timeouts = []
+
+        def mock_get(url, timeout=None, **kwargs):
+            timeouts.append(timeout)
+            raise requests.ReadTimeout()
+
+        session = MockSession(mock_get)
+        try:
+            homework.request_api_answer({}, 1, session)
+        except HTTPTimeoutError:
+            pass
+        else:
+            assert False, 'Ожидалась ошибка HTTPTimeoutError'
+        assert issubclass(HTTPTimeoutError, HTTPConnectionError)
+        assert timeouts == [
+            (homework.CONNECT_TIMEOUT, homework.READ_TIMEOUT)
+        ], 'Запрос к API должен выполняться с таймаутами'
+
+        try:
+            homework.request_api_answer({}, 1, session, None, Deadline(0))
+        except HTTPTimeoutError:
+            pass
+        else:
+            assert False, 'Исчерпанный бюджет должен прерывать запрос'
+        assert len(timeouts) == 1, (
+            'После исчерпания бюджета запрос не должен отправляться'
+        )
+
+    def test_hedged_request(self):
+        from http_client import HedgedSession
+
+        counter = itertools.count()
+        release = threading.Event()
+
+        def mock_get(url, **kwargs):
+            if next(counter) == 0:
+                release.wait(1)
+                return MockResponse({'slow': True})
+            return MockResponse({'slow': False})
+
+        session = HedgedSession(MockSession(mock_get), min_samples=5)
+        session.latencies.extend([0.01] * 5)
+        started = time.monotonic()
+        response = session.get('url')
+        elapsed = time.monotonic() - started
+        release.set()
+        session.close()
+        assert response.json() == {'slow': False}, (
+            'Должен использоваться ответ, пришедший первым'
+        )
+        assert elapsed < 0.5, 'Медленный запрос должен дублироваться'
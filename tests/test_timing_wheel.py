@@ -0,0 +1,39 @@
+import math
+import random
+
+
+class TestTimingWheel:
+
+    def test_expires_on_time(self):
+        from timing_wheel import TimingWheel
+
+        generator = random.Random(1)
+        wheel = TimingWheel(tick=1.0, now=10.0, slots=4, levels=3)
+        pending = {}
+        now = 10.0
+        for step in range(2000):
+            if generator.random() < 0.5:
+                when = now + generator.uniform(-1, 60)
+                pending[step] = wheel.schedule(when, step)
+            elif generator.random() < 0.2 and pending:
+                wheel.cancel(pending.pop(generator.choice(list(pending))))
+            else:
+                now += generator.uniform(0, 5)
+                for timer in wheel.advance(now):
+                    assert timer.expires <= math.floor(now)
+                    assert pending.pop(timer.item) is timer
+            assert all(
+                timer.expires > wheel.current for timer in pending.values()
+            ), 'Задания не должны срабатывать позже своего тика'
+        assert len(wheel) == len(pending)
+
+    def test_phase_and_spread(self):
+        from scheduler import SPREAD, phase, spread
+
+        phases = [phase(f'token{number}') for number in range(1000)]
+        assert phase('token1') == phases[1], 'Сдвиг должен быть постоянным'
+        assert all(0 <= value < 1 for value in phases)
+        assert max(phases) - min(phases) > 0.9, (
+            'Сдвиги должны распределяться по всему интервалу'
+        )
+        assert 1 - SPREAD <= spread('token1') <= 1 + SPREAD
@@ -1,3 +1,4 @@
+import json
 from inspect import signature
 from types import ModuleType
 
@@ -37,3 +38,42 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+class MockResponse:
+
+    def __init__(self, data, status_code=200, headers=None):
+        self.data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(data).encode()
+
+    def json(self):
+        return self.data
+
+    def close(self):
+        pass
+
+
+class MockSession:
+
+    def __init__(self, get):
+        self.get = get
+
+    def head(self, url, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+class MockBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+    @property
+    def texts(self):
+        return [text for _, text in self.sent]
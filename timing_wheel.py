@@ -0,0 +1,106 @@
+import math
+
+TICK = 1.0
+SLOTS = 256
+LEVELS = 4
+
+
+class Timer:
+    """Запланированное задание в колесе таймеров."""
+
+    __slots__ = ('when', 'expires', 'item', 'slot')
+
+    def __init__(self, when, expires, item):
+        self.when = when
+        self.expires = expires
+        self.item = item
+        self.slot = None
+
+
+class TimingWheel:
+    """Иерархическое колесо таймеров.
+
+    Время делится на тики длиной tick. На уровне 0 каждая ячейка — один
+    тик, на уровне L — slots ** L тиков; задания дальних уровней
+    спускаются на нижние, когда до них доходит очередь. Добавление,
+    отмена и срабатывание задания стоят O(1) независимо от числа заданий,
+    а срок срабатывания округляется вверх до тика.
+    """
+
+    def __init__(self, tick=TICK, now=0.0, slots=SLOTS, levels=LEVELS):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.wheels = [[set() for _ in range(slots)] for _ in range(levels)]
+        self.current = math.floor(now / tick)
+        self.horizon = slots ** levels - 1
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, when, item):
+        """Срабатывание item в момент when (не раньше следующего тика)."""
+        expires = min(
+            max(math.ceil(when / self.tick), self.current + 1),
+            self.current + self.horizon
+        )
+        timer = Timer(when, expires, item)
+        self.place(timer)
+        self.count += 1
+        return timer
+
+    def cancel(self, timer):
+        """Отмена задания; повторная отмена ничего не делает."""
+        if timer.slot is not None:
+            timer.slot.discard(timer)
+            timer.slot = None
+            self.count -= 1
+
+    def place(self, timer):
+        """Размещение задания на уровне, который покрывает его срок."""
+        delta = timer.expires - self.current
+        level = 0
+        span = self.slots
+        while delta >= span and level < self.levels - 1:
+            level += 1
+            span *= self.slots
+        index = timer.expires // (span // self.slots) % self.slots
+        timer.slot = self.wheels[level][index]
+        timer.slot.add(timer)
+
+    def next_tick(self):
+        """Момент начала следующего тика."""
+        return (self.current + 1) * self.tick
+
+    def advance(self, now):
+        """Сдвиг колеса до момента now; сработавшие задания по порядку."""
+        target = math.floor(now / self.tick)
+        if not self.count:
+            self.current = max(self.current, target)
+            return []
+        expired = []
+        while self.current < target and self.count:
+            self.current += 1
+            self.cascade()
+            slot = self.wheels[0][self.current % self.slots]
+            if slot:
+                for timer in slot:
+                    timer.slot = None
+                expired.extend(slot)
+                self.count -= len(slot)
+                slot.clear()
+        self.current = max(self.current, target)
+        return expired
+
+    def cascade(self):
+        """Спуск заданий с верхних уровней, чья ячейка стала текущей."""
+        for level in range(self.levels - 1, 0, -1):
+            span = self.slots ** level
+            if self.current % span:
+                continue
+            slot = self.wheels[level][self.current // span % self.slots]
+            timers = list(slot)
+            slot.clear()
+            for timer in timers:
+                self.place(timer)
@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from homework import logger
+
+# Как часто супервизор проверяет воркеров и перезапускает упавших.
+CHECK_INTERVAL = 1
+STOP_TIMEOUT = 5
+
+
+def worker_path(path, index):
+    """Файл воркера рядом с общим: homework_bot.log → homework_bot.1.log."""
+    if not path:
+        return path
+    directory, name = os.path.split(path)
+    head, dot, tail = name.partition('.')
+    name = f'{head}.{index}.{tail}' if dot else f'{name}.{index}'
+    return os.path.join(directory, name)
+
+
+def run_worker(index):
+    """Воркер: опрос подписок, аренду которых он удерживает.
+
+    Лог, журнал, профиль и очередь недосланного у каждого воркера свои,
+    метрики отдаются на METRICS_PORT + номер воркера.
+    """
+    import homework
+    from log_config import LOG_FILE
+    from outbox import SPILL_FILE
+    from sharding import LeaseStore, ShardCoordinator
+
+    os.environ['LOG_FILE'] = worker_path(
+        os.getenv('LOG_FILE', LOG_FILE), index
+    )
+    homework.bootstrap()
+    worker = f'{socket.gethostname()}-{os.getpid()}'
+    shard = ShardCoordinator(LeaseStore(homework.LEASE_FILE, worker))
+    logger.info('Воркер %s запущен.', worker)
+    metrics_port = homework.METRICS_PORT
+    homework.run_bot(
+        shard=shard,
+        metrics_port=int(metrics_port) + index if metrics_port else None,
+        record_file=worker_path(homework.RECORD_FILE, index),
+        spill_file=worker_path(SPILL_FILE, index),
+        profile_file=worker_path(homework.PROFILE_FILE, index),
+    )
+
+
+def run_workers(count, check_interval=CHECK_INTERVAL):
+    """Супервизор: count процессов-воркеров, упавшие перезапускаются.
+
+    По SIGTERM или SIGINT воркерам отправляется SIGTERM, и каждый
+    завершается штатно, освобождая аренду своих подписок.
+    """
+    context = multiprocessing.get_context('spawn')
+    stopping = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stopping.set())
+
+    processes = {}
+    logger.info('Запуск воркеров: %d.', count)
+    while not stopping.is_set():
+        for index in range(count):
+            process = processes.get(index)
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                logger.error(
+                    'Воркер %d завершился с кодом %s, перезапуск.',
+                    index, process.exitcode
+                )
+            process = context.Process(
+                target=run_worker, args=(index,), name=f'worker-{index}'
+            )
+            process.start()
+            processes[index] = process
+        stopping.wait(check_interval)
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        process.join(STOP_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+    logger.info('Воркеры остановлены.')